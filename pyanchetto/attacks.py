@@ -0,0 +1,99 @@
+"""
+Per-square attack tables built once at import time.
+
+Leaper tables (knight, king and pawn captures) hold both a bitboard of attacked squares and the ready-made move
+tuples for every origin square, so move generation only has to filter them against the occupancy masks. Sliding
+pieces use ray tables: for each of the eight directions, the mask of squares from an origin to the edge of the
+board, and the matching move tuples ordered outward from the origin.
+"""
+from pyanchetto.bitboard import SIZE, SQUARES, lsb, msb
+
+knight_warps = [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (-1, 2), (1, -2), (-1, -2)]
+king_warps = [(1, 1), (-1, -1), (1, -1), (-1, 1), (0, 1), (0, -1), (1, 0), (-1, 0)]
+pawn_capture_warps = [[(-1, 1), (1, 1)], [(-1, -1), (1, -1)]]
+
+NORTH, SOUTH, EAST, WEST, NORTH_EAST, SOUTH_WEST, NORTH_WEST, SOUTH_EAST = range(8)
+directions = ((0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (-1, -1), (-1, 1), (1, -1))
+orthogonal_directions = (NORTH, SOUTH, EAST, WEST)
+diagonal_directions = (NORTH_EAST, SOUTH_WEST, NORTH_WEST, SOUTH_EAST)
+#rays in positive directions run towards higher squares, so their nearest blocker is the lowest set bit
+positive_directions = tuple(d[1] * SIZE + d[0] > 0 for d in directions)
+
+
+def _on_board(f, r): return 0 <= f < SIZE and 0 <= r < SIZE
+
+
+def _leaper_moves(warps):
+    table = []
+    for sq in range(SQUARES):
+        f, r = sq % SIZE, sq // SIZE
+        table.append(tuple(((r + w[1]) * SIZE + f + w[0], (f + w[0], r + w[1], True))
+                           for w in warps if _on_board(f + w[0], r + w[1])))
+    return tuple(table)
+
+
+def _ray_moves(direction):
+    table = []
+    for sq in range(SQUARES):
+        f, r = sq % SIZE + direction[0], sq // SIZE + direction[1]
+        ray = []
+        while _on_board(f, r):
+            ray.append((f, r, True))
+            f, r = f + direction[0], r + direction[1]
+        table.append(tuple(ray))
+    return tuple(table)
+
+
+def _mask(coords): return sum(1 << (c[1] * SIZE + c[0]) for c in coords)
+
+
+#knight_moves[sq] = ((to_square, (file, rank, True)), ...) in knight_warps order
+knight_moves = _leaper_moves(knight_warps)
+knight_attacks = tuple(_mask(m for s, m in moves) for moves in knight_moves)
+king_moves = _leaper_moves(king_warps)
+king_attacks = tuple(_mask(m for s, m in moves) for moves in king_moves)
+#indexed by color - 1 like pawn_capture_warps, i.e. the squares a pawn of that color attacks
+pawn_capture_moves = tuple(_leaper_moves(warps) for warps in pawn_capture_warps)
+pawn_attacks = tuple(tuple(_mask(m for s, m in moves) for moves in table) for table in pawn_capture_moves)
+#ray_moves[direction][sq] = ((file, rank, True), ...) ordered outward from sq, rays[direction][sq] is its mask
+ray_moves = tuple(_ray_moves(d) for d in directions)
+rays = tuple(tuple(_mask(moves) for moves in table) for table in ray_moves)
+#every square a rook or bishop on sq could reach on an empty board
+orthogonal_rays = tuple(sum(rays[d][sq] for d in orthogonal_directions) for sq in range(SQUARES))
+diagonal_rays = tuple(sum(rays[d][sq] for d in diagonal_directions) for sq in range(SQUARES))
+square_distance = tuple(tuple(max(abs(a % SIZE - b % SIZE), abs(a // SIZE - b // SIZE)) for b in range(SQUARES))
+                        for a in range(SQUARES))
+
+
+
+def _between(a, b):
+    for direction in range(len(directions)):
+        if rays[direction][a] >> b & 1:
+            return rays[direction][a] ^ rays[direction][b] ^ (1 << b)
+    return 0
+
+
+#between[a][b] = squares strictly between a and b when they share a rank, file or diagonal (otherwise 0)
+between = tuple(tuple(_between(a, b) for b in range(SQUARES)) for a in range(SQUARES))
+
+def ray_attacks(direction, sq, occupied):
+    """Squares attacked from sq along one direction, up to and including the first occupied square."""
+    ray = rays[direction][sq]
+    blockers = ray & occupied
+    if blockers:
+        ray ^= rays[direction][lsb(blockers) if positive_directions[direction] else msb(blockers)]
+    return ray
+
+
+def rook_attacks(sq, occupied):
+    return ray_attacks(NORTH, sq, occupied) | ray_attacks(SOUTH, sq, occupied) | \
+           ray_attacks(EAST, sq, occupied) | ray_attacks(WEST, sq, occupied)
+
+
+def bishop_attacks(sq, occupied):
+    return ray_attacks(NORTH_EAST, sq, occupied) | ray_attacks(SOUTH_WEST, sq, occupied) | \
+           ray_attacks(NORTH_WEST, sq, occupied) | ray_attacks(SOUTH_EAST, sq, occupied)
+
+
+def queen_attacks(sq, occupied):
+    return rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
@@ -0,0 +1,47 @@
+"""
+Helpers for 64-bit board masks (bitboards).
+
+Squares are numbered rank-major from a1 = 0 to h8 = 63, so a (file, rank) coordinate lives on square
+rank * 8 + file and is represented by the mask 1 << square.
+"""
+
+SIZE = 8
+SQUARES = SIZE * SIZE
+FULL = (1 << SQUARES) - 1
+square_coords = tuple((sq % SIZE, sq // SIZE) for sq in range(SQUARES))
+file_masks = tuple(sum(1 << (r * SIZE + f) for r in range(SIZE)) for f in range(SIZE))
+rank_masks = tuple(sum(1 << (r * SIZE + f) for f in range(SIZE)) for r in range(SIZE))
+
+def square(coord): return coord[1] * SIZE + coord[0]
+def square_bit(coord): return 1 << (coord[1] * SIZE + coord[0])
+def lsb(bb): return (bb & -bb).bit_length() - 1
+def msb(bb): return bb.bit_length() - 1
+
+try:
+    popcount = int.bit_count
+except AttributeError: #python < 3.10
+    def popcount(bb): return bin(bb).count("1")
+
+
+def iter_squares(bb):
+    """Yield the square index of every set bit in a bitboard, lowest square first."""
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def iter_coords(bb):
+    """Yield the (file, rank) coordinate of every set bit in a bitboard, lowest square first."""
+    while bb:
+        low = bb & -bb
+        yield square_coords[low.bit_length() - 1]
+        bb ^= low
+
+
+def bitboard_str(bb):
+    """Render a bitboard as an 8x8 grid of 1s and 0s with rank 8 at the top (useful for debugging)."""
+    rows = []
+    for r in range(SIZE - 1, -1, -1):
+        rows.append(" ".join("1" if bb >> (r * SIZE + f) & 1 else "0" for f in range(SIZE)))
+    return "\n".join(rows) + "\n"
@@ -1,6 +1,15 @@
-import copy
 import logging
-import math
+import re
+from array import array
+
+from pyanchetto.attacks import knight_warps, king_warps, pawn_capture_warps, knight_moves, king_moves, \
+    pawn_capture_moves, ray_moves, rays, positive_directions, orthogonal_directions, diagonal_directions, \
+    square_distance, knight_attacks, king_attacks, pawn_attacks, orthogonal_rays, diagonal_rays, rook_attacks, \
+    bishop_attacks, between
+from pyanchetto.bitboard import FULL, square_coords, iter_squares, iter_coords, popcount, lsb, msb
+from pyanchetto.move_encoding import NORMAL_MOVE, PROMOTION, EN_PASSANT, CASTLE, encode, encode_tuple, \
+    promotion_types, promotion_types_index, square_names_index
+from pyanchetto.zobrist import piece_keys, castling_keys, en_passant_keys, side_key
 
 #import cython
 
@@ -9,23 +18,29 @@ piece_types = ("K", "Q", "R", "B", "N", "P")
 pieces = (".", "K", "Q", "R", "B", "N", "P", "k", "q", "r", "b", "n", "p")
 pieces_index = {pieces[i]: i for i in range(len(pieces))}
 pieces_type_map = {p_type: (pieces_index[p_type], pieces_index[p_type.lower()]) for p_type in piece_types}
+pieces_color = (0, 1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 2, 2)
 pieces_ascii = (".", "♔", "♕", "♖", "♗", "♘", "♙", "♚", "♛", "♜", "♝", "♞", "♟")
 home_row = ["R", "N", "B", "Q", "K", "B", "N", "R"]
 promotion_candidates = ("Q", "R", "B", "N")
 game_termination_markers = ["1/2-1/2", "1-0", "0-1", "*"] #draw, white, black, ongoing/abandonded
 rook_positions = [(0, 0), (7, 0), (0, 7), (7, 7)]
 rook_positions_index = {rook_positions[i]: i for i in range(len(rook_positions))}
+castling_letters = ("Q", "K", "q", "k") #FEN castling rights, indexed like rook_positions
 king_positions = [(4, 0), (4, 7)]
 king_castle_end_positions = [(2, 0, False), (6, 0, False), (2, 7, False), (6, 7, False)]
 king_castle_end_positions_index = {king_castle_end_positions[i]: i for i in range(len(king_castle_end_positions))}
 rook_castle_end_positions = [(3, 0, False), (5, 0, False), (3, 7, False), (5, 7, False)]
 rook_castle_end_positions_index = {rook_castle_end_positions[i]: i for i in range(len(rook_castle_end_positions))}
 all_coords = [(i, j) for i in range(SIZE) for j in range(SIZE)]
-knight_warps = [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (-1, 2), (1, -2), (-1, -2)]
-king_warps = [(1, 1), (-1, -1), (1, -1), (-1, 1), (0, 1), (0, -1), (1, 0), (-1, 0)]
-pawn_capture_warps = [[(-1, 1), (1, 1)], [(-1, -1), (1, -1)]]
 EMPTY, WHITE, BLACK = 0, 1, 2
 NORMAL, CHECK, CHECKMATE, STALEMATE, DRAW = 0, 1, 2, 3, 4
+#legal move filters: play and undo every pseudo-legal move, or filter with pin and check-evasion masks
+VALIDATE_SIMULATE, VALIDATE_MASKS = 0, 1
+FIFTY_MOVE_PLIES = 100
+#position-only part of game_state (mobility, check, insufficient material) by Zobrist key, cleared when full
+GAME_STATE_CACHE_SIZE = 1 << 16
+game_state_cache = {}
+san_regex = re.compile(r"^(?:(O-O-O|0-0-0)|(O-O|0-0)|([KQRBN])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([QRBN]))?)[+#]?[!?]*$")
 
 def file_to_index(file): return ord(file) - 97
 def index_to_file(index): return chr(index + 97)
@@ -42,26 +57,33 @@ class BadMoveException(Exception):
 class BadPromotionException(Exception):
     pass
 
+class BadFenException(Exception):
+    pass
+
 class Chess:
 
     def __init__(self, other=None):
         if other is not None:
             self.board = [[other.board[row][col] for col in range(SIZE)] for row in range(SIZE)]
-            self.rooks_moved = copy.deepcopy(other.rooks_moved)
-            self.kings_moved = copy.deepcopy(other.kings_moved)
-            self.kings_castled = copy.deepcopy(other.kings_castled)
+            self.rooks_moved = list(other.rooks_moved)
+            self.kings_moved = list(other.kings_moved)
+            self.kings_castled = list(other.kings_castled)
             self.current_player = other.current_player
-            self.move_list = copy.deepcopy(other.move_list)
-            self.pgn_str = copy.deepcopy(other.pgn_str)
-            self.captured_pieces = copy.deepcopy(other.captured_pieces)
-            self.promoted_pieces = copy.deepcopy(other.promoted_pieces)
-            self.player_pieces_list = copy.deepcopy(other.player_pieces_list)
+            self.en_passant = other.en_passant
+            #moves, captures and promotions are immutable tuples so shallow copies are enough
+            self.move_list = list(other.move_list)
+            self.state_history = list(other.state_history)
+            self.pgn_str = list(other.pgn_str)
+            self.captured_pieces = dict(other.captured_pieces)
+            self.promoted_pieces = dict(other.promoted_pieces)
+            self.bitboards = list(other.bitboards)
+            self.occupancy = list(other.occupancy)
+            self.zobrist_key = other.zobrist_key
+            self.start_ply, self.half_move_clock = other.start_ply, other.half_move_clock
+            self.piece_counts = list(other.piece_counts)
+            self.score_tables, self.material, self.positional = other.score_tables, other.material, other.positional
         else:
-            self.board = [[0 for col in range(SIZE)] for row in range(SIZE)]
-            self.rooks_moved, self.kings_moved, self.kings_castled = [-1, -1, -1, -1], [-1, -1], [-1, -1]
-            self.current_player = 1
-            self.move_list, self.pgn_str = [], []
-            self.captured_pieces, self.promoted_pieces = {}, {}
+            self.__init_state()
             self.__set_row(0, home_row)
             self.__set_row(1, ["P"] * 8)
             self.__set_row(6, ["p"] * 8)
@@ -69,121 +91,370 @@ class Chess:
             self.init_player_pieces()
 
 
+    def __init_state(self):
+        """Empty board, white to move, every castling right available."""
+        self.board = [[0 for col in range(SIZE)] for row in range(SIZE)]
+        self.rooks_moved, self.kings_moved, self.kings_castled = [-1, -1, -1, -1], [-1, -1], [-1, -1]
+        self.current_player = 1
+        self.en_passant = None
+        self.move_list, self.state_history, self.pgn_str = [], [], []
+        self.captured_pieces, self.promoted_pieces = {}, {}
+        self.bitboards, self.occupancy = [0] * len(pieces), [0, 0, 0]
+        self.zobrist_key = 0
+        #plies played before the first move in move_list (non-zero for games loaded from FEN)
+        self.start_ply = 0
+        #plies since the last capture or pawn move, kept up to date by make_move and unmake_move
+        self.half_move_clock = 0
+        #number of pieces of each type, indexed like pieces (index 0 counts the empty squares)
+        self.piece_counts = [0] * len(pieces)
+        #optional (material, positional) tables summed into self.material and self.positional, see track_scores
+        self.score_tables, self.material, self.positional = None, 0, 0
+
+
+    @classmethod
+    def from_fen(cls, fen):
+        """
+        Create a game from a FEN string. The position starts with an empty move_list: castling rights that are
+        missing from the FEN are recorded as rooks (or kings) that moved before the game started (-2 in
+        rooks_moved/kings_moved) so make_move and unmake_move never restore them, and the half-move clock and
+        full-move number are kept as an offset from which fen() and the PGN move numbers continue counting. The
+        clock fields are optional and default to 0 and 1.
+        """
+        fields = fen.split()
+        rows = fields[0].split("/") if fields else []
+        if len(fields) < 4 or len(fields) > 6 or len(rows) != SIZE or fields[1] not in ("w", "b") or \
+                not all(field.isdigit() for field in fields[4:]) or (len(fields) == 6 and int(fields[5]) < 1):
+            raise BadFenException(fen)
+        game = cls.__new__(cls)
+        game.__init_state()
+        for r, row in enumerate(reversed(rows)):
+            f = 0
+            for c in row:
+                if c in "12345678":
+                    f += int(c)
+                elif c in pieces_index and c != "." and f < SIZE:
+                    game.board[r][f] = pieces_index[c]
+                    f += 1
+                else:
+                    raise BadFenException(fen)
+            if f != SIZE:
+                raise BadFenException(fen)
+        game.current_player = WHITE if fields[1] == "w" else BLACK
+        castling = fields[2]
+        game.rooks_moved = [-1 if letter in castling else -2 for letter in castling_letters]
+        game.kings_moved = [-1 if -1 in game.rooks_moved[i * 2:i * 2 + 2] else -2 for i in range(2)]
+        if fields[3] != "-":
+            if not re.match("^[a-h][36]$", fields[3]):
+                raise BadFenException(fen)
+            game.en_passant = rank_file_to_coord(fields[3])
+        game.half_move_clock = int(fields[4]) if len(fields) > 4 else 0
+        full_moves = int(fields[5]) if len(fields) > 5 else 1
+        game.start_ply = (full_moves - 1) * 2 + (1 if game.current_player == BLACK else 0)
+        game.init_player_pieces()
+        return game
+
+
     def __set_row(self, row, row_pieces):
         for col in range(SIZE):
             self.set_coord((col, row), pieces_index[row_pieces[col]])
 
 
     def init_player_pieces(self):
-        self.player_pieces_list = [{c for c in all_coords if self.color(c) == color} for color in (WHITE, BLACK)]
-        self.player_pieces_types = {}
+        """
+        Rebuild the bitboards from the board matrix. Must be called after the board matrix is modified directly
+        (i.e. not through set_coord or move).
+
+        self.bitboards holds one 64-bit mask per piece type (indexed like pieces, index 0 is unused) and
+        self.occupancy holds the squares occupied by [either color, WHITE, BLACK] (indexed by color).
+        """
+        self.bitboards, self.occupancy = [0] * len(pieces), [0, 0, 0]
+        self.piece_counts = [0] * len(pieces)
+        for coord in all_coords:
+            piece = self.board[coord[1]][coord[0]]
+            self.piece_counts[piece] += 1
+            if piece != EMPTY:
+                bit = 1 << (coord[1] * SIZE + coord[0])
+                self.bitboards[piece] |= bit
+                self.occupancy[pieces_color[piece]] |= bit
+                self.occupancy[EMPTY] |= bit
+        self.zobrist_key = self.compute_zobrist_key()
+        if self.score_tables is not None:
+            self.track_scores(*self.score_tables)
+
+
+    def track_scores(self, material_table, positional_table):
+        """
+        Keep running evaluation sums that set_coord and every move and undo update in place, so an evaluation does
+        not have to scan the board. self.material is the sum of material_table[piece] and self.positional the sum
+        of positional_table[piece][square] over every piece on the board (both tables are indexed like pieces and
+        must hold zeros for the empty square). Pass None to stop tracking.
+        """
+        self.score_tables, self.material, self.positional = None, 0, 0
+        if material_table is None:
+            return
+        self.score_tables = (material_table, positional_table)
+        for piece in range(1, len(pieces)):
+            for sq in iter_squares(self.bitboards[piece]):
+                self.material += material_table[piece]
+                self.positional += positional_table[piece][sq]
 
 
     def set_coord(self, coord: tuple, piece):
+        bit = 1 << (coord[1] * SIZE + coord[0])
+        old_piece = self.board[coord[1]][coord[0]]
+        sq = coord[1] * SIZE + coord[0]
+        if old_piece != EMPTY:
+            self.bitboards[old_piece] ^= bit
+            self.occupancy[pieces_color[old_piece]] ^= bit
+            self.occupancy[EMPTY] ^= bit
+        if piece != EMPTY:
+            self.bitboards[piece] |= bit
+            self.occupancy[pieces_color[piece]] |= bit
+            self.occupancy[EMPTY] |= bit
+        self.zobrist_key ^= piece_keys[old_piece][sq] ^ piece_keys[piece][sq]
+        self.piece_counts[old_piece] -= 1
+        self.piece_counts[piece] += 1
+        if self.score_tables is not None:
+            material, positional = self.score_tables
+            self.material += material[piece] - material[old_piece]
+            self.positional += positional[piece][sq] - positional[old_piece][sq]
         self.board[coord[1]][coord[0]] = piece
 
 
+    def castling_rights(self):
+        """Returns a bitmask with one bit per entry of rook_positions whose rook and king have both never moved."""
+        rights = 0
+        for rook_index in range(len(rook_positions)):
+            if self.rooks_moved[rook_index] == -1 and self.kings_moved[rook_index // 2] == -1:
+                rights |= 1 << rook_index
+        return rights
+
+
+    def compute_zobrist_key(self):
+        """
+        Computes the Zobrist key of the current position from scratch (see zobrist.py). The key is kept up to date
+        incrementally in self.zobrist_key by make_move and unmake_move.
+        """
+        key = 0
+        for piece in range(1, len(pieces)):
+            for sq in iter_squares(self.bitboards[piece]):
+                key ^= piece_keys[piece][sq]
+        key ^= castling_keys[self.castling_rights()] ^ self.__en_passant_key()
+        return key ^ side_key if self.current_player == BLACK else key
+
+
+    def __en_passant_key(self):
+        """The en pessant part of the Zobrist key, set only if the player to move has a pawn that can capture."""
+        ep = self.en_passant
+        if ep is None:
+            return 0
+        player = self.current_player
+        if pawn_attacks[2 - player][ep[1] * SIZE + ep[0]] & self.bitboards[pieces_type_map["P"][player - 1]]:
+            return en_passant_keys[ep[0]]
+        return 0
+
+
     def get_coord(self, coord: tuple):
         return self.board[coord[1]][coord[0]]
 
 
     def color(self, coord: tuple):
         """Returns the color of the piece at a location (or the EMPTY color if no piece is at that location)."""
-        piece_type = self.board[coord[1]][coord[0]]
-        if piece_type == EMPTY:
-            return EMPTY
-        return WHITE if piece_type < 7 else BLACK
+        bit = 1 << (coord[1] * SIZE + coord[0])
+        if self.occupancy[WHITE] & bit:
+            return WHITE
+        return BLACK if self.occupancy[BLACK] & bit else EMPTY
 
 
     def is_type(self, coord: tuple, piece_type: str):
         """Returns true if the piece at a location is the given type of piece."""
-        return pieces[self.board[coord[1]][coord[0]]].lower() == piece_type.lower()
+        return self.board[coord[1]][coord[0]] in pieces_type_map[piece_type.upper()]
 
 
     def player_pieces_of_type(self, piece_type, player):
         """Get all pieces of a certain type for a player."""
-        for coord in self.player_pieces_list[player - 1]:
-            if self.board[coord[1]][coord[0]] in pieces_type_map[piece_type]:
-                yield coord
+        return iter_coords(self.bitboards[pieces_type_map[piece_type.upper()][player - 1]])
 
 
     def player_pieces(self, player):
         """Return a list of all pieces that belong to a player."""
-        return self.player_pieces_list[player - 1]
+        return list(iter_coords(self.occupancy[player]))
 
 
-    def get_player_piece_types(self):
-        move_num = len(self.move_list)
-        if move_num not in self.player_pieces_types:
-            white_pieces = [self.board[p[1]][p[0]] for p in self.player_pieces(WHITE)]
-            white_pieces.sort()
-            black_pieces = [self.board[p[1]][p[0]] for p in self.player_pieces(BLACK)]
-            black_pieces.sort()
-            self.player_pieces_types[move_num] = [white_pieces, black_pieces]
-        return self.player_pieces_types[move_num][0], self.player_pieces_types[move_num][1]
+    def game_state(self):
+        """
+        Returns the state of the game for the player to move: NORMAL, CHECK, CHECKMATE, STALEMATE or DRAW (insufficient
+        material). The result only depends on the position and is cached by Zobrist key. Threefold repetition and the
+        fifty-move rule are draws a player has to claim and do not change whether a move gives check, see
+        draw_claimable.
+        """
+        state = game_state_cache.get(self.zobrist_key)
+        if state is None:
+            state = self.__position_state()
+            if len(game_state_cache) >= GAME_STATE_CACHE_SIZE:
+                game_state_cache.clear()
+            game_state_cache[self.zobrist_key] = state
+        return state
+
+
+    def draw_claimable(self):
+        """Determines if the player to move may claim a draw by threefold repetition or the fifty-move rule."""
+        return self.half_move_clock >= FIFTY_MOVE_PLIES or self.repetitions() >= 3
+
+
+    def __position_state(self):
+        """Game state ignoring the move history. Move generation stops at the first legal move found."""
+        if popcount(self.occupancy[EMPTY]) <= 4 and self.__insufficient_material():
+            return DRAW
+        player = self.current_player
+        masks = self.legal_masks(player)
+        check = masks is not None and masks[1] != FULL
+        for p in iter_coords(self.occupancy[player]):
+            if next(self.__masked_moves(p, masks), None) is not None:
+                return CHECK if check else NORMAL
+        return CHECKMATE if check else STALEMATE
+
+
+    def __insufficient_material(self):
+        """Neither player can mate: each has a lone king or a king and a single bishop or knight."""
+        counts = self.piece_counts
+        for offset in (0, 6):
+            if counts[1 + offset] != 1 or counts[2 + offset] or counts[3 + offset] or counts[6 + offset] or \
+                    counts[4 + offset] + counts[5 + offset] > 1:
+                return False
+        return True
 
 
-    def game_state(self):
-        #FIXME cache threats and pass it to check_check
-        #TODO threefold repetition and fifty move rule?
-        num_pieces = len(self.player_pieces_list[0]) + len(self.player_pieces_list[1])
-        if num_pieces <= 4:
-            # check for sufficient material
-            white_pieces, black_pieces = self.get_player_piece_types()
-            if white_pieces == [1] and black_pieces == [7]:  # king v king
-                return DRAW
-            if white_pieces == [1, 4] and black_pieces == [7, 10]: # king bishop v king bishop
-                return DRAW
-            if white_pieces == [1] and black_pieces == [7, 10]:  # king v king bishop
-                return DRAW
-            if white_pieces == [1, 4] and black_pieces == [7]:  # king bishop v king
-                return DRAW
-            if white_pieces == [1, 5] and black_pieces == [7, 11]:  # king knight v king knight
-                return DRAW
-            if white_pieces == [1] and black_pieces == [7, 11]:  # king v king knight
-                return DRAW
-            if white_pieces == [1, 5] and black_pieces == [7]: # king knight v king
-                return DRAW
-            if white_pieces == [1, 5] and black_pieces == [7, 10]:  # king knight v king bishop
-                return DRAW
-            if white_pieces == [1, 4] and black_pieces == [7, 11]:  # king bishop v king knight
-                return DRAW
-        piece_moves = self.valid_moves_for_player(self.current_player, True)
-        has_next_move = False
-        for piece in piece_moves:
-            has_next_move = has_next_move or (next(piece_moves[piece], None) is not None)
-        check = self.in_check(self.current_player)
-        if not has_next_move:
-            return CHECKMATE if check else STALEMATE
-        return CHECK if check else NORMAL
-
-
-    def valid_moves(self):
-        threats = self.compute_threat_matrix(self.current_player)
-        moves = self.valid_moves_for_player(self.current_player, True, threats)
-        return moves
-
-
-    def valid_moves_for_player(self, player, validate=True, threats=None):
-        pieces = [p for p in self.player_pieces(player)]
-        return {piece: self.valid_piece_moves(piece, validate, threats) for piece in pieces}
-
-
-    def valid_piece_moves(self, p, validate=True, threats=None):
+    def repetitions(self):
+        """
+        Returns how many times the current position has occurred in the game (1 if it is new). Only positions since
+        the last capture or pawn move with the same player to move can repeat, so at most half_move_clock / 2 keys
+        are compared.
+        """
+        key, count = self.zobrist_key, 1
+        history = self.state_history
+        oldest = len(history) - min(self.half_move_clock, len(history))
+        for ply in range(len(history) - 2, oldest - 1, -2):
+            if history[ply][1] == key:
+                count += 1
+        return count
+
+
+    def valid_moves(self, mode=VALIDATE_MASKS):
+        """
+        Returns a dictionary mapping each of the current player's pieces to a generator of its legal moves.
+
+        Parameters
+        ----------
+        mode: int (optional, default VALIDATE_MASKS)
+            VALIDATE_MASKS filters moves with pin and check-evasion masks computed once for the position,
+            VALIDATE_SIMULATE plays every pseudo-legal move and tests whether it leaves the king in check.
+        """
+        return self.valid_moves_for_player(self.current_player, True, mode)
+
+
+    def valid_moves_encoded(self, mode=VALIDATE_MASKS):
+        """Returns the current player's legal moves packed into an array('H') (see move_encoding.py)."""
+        piece_moves = self.valid_moves(mode)
+        return array("H", [encode_tuple(piece, move) for piece in piece_moves for move in piece_moves[piece]])
+
+
+    def valid_moves_for_player(self, player, validate=True, mode=VALIDATE_MASKS):
+        if validate and mode == VALIDATE_MASKS:
+            masks = self.legal_masks(player)
+            return {piece: self.__masked_moves(piece, masks) for piece in self.player_pieces(player)}
+        return {piece: self.valid_piece_moves(piece, validate, mode) for piece in self.player_pieces(player)}
+
+
+    def valid_piece_moves(self, p, validate=True, mode=VALIDATE_MASKS):
+        if validate and mode == VALIDATE_MASKS:
+            return self.__masked_moves(p, self.legal_masks(pieces_color[self.board[p[1]][p[0]]]))
+        return self.__simulated_moves(p, validate)
+
+
+    def __pseudo_legal_moves(self, p):
         p_type = self.board[p[1]][p[0]]
         p_type = p_type - 6 if p_type > 6 else p_type
         funcs = [lambda f, r: [], self.__king, self.__queen, self.__rook, self.__bishop, self.__knight, self.__pawn]
-        moves = funcs[p_type](p[0], p[1], threats) if p_type == 1 else funcs[p_type](p[0], p[1])
+        return funcs[p_type](p[0], p[1])
+
+
+    def legal_masks(self, color):
+        """
+        Computes the information needed to filter pseudo-legal moves without simulating them.
+
+        Returns
+        _______
+        A tuple (king_square, check_mask, pins) or None if the player has no king. check_mask is a bitboard of the
+        squares a non-king move must land on (every square when not in check, the checker and the squares between
+        it and the king when in check, and no squares in double check). pins maps the square of each pinned piece
+        to a bitboard of the line it may move along (including capturing the pinning piece).
+        """
+        king = self.bitboards[pieces_type_map["K"][color - 1]]
+        if not king:
+            return None
+        king_sq = lsb(king)
+        enemy = inverse_color(color)
+        checkers = self.attackers(square_coords[king_sq], enemy)
+        if not checkers:
+            check_mask = FULL
+        elif checkers & (checkers - 1):
+            check_mask = 0
+        else:
+            check_mask = checkers | between[king_sq][lsb(checkers)]
+        pins = {}
+        bb, offset = self.bitboards, 0 if enemy == WHITE else 6
+        queens = bb[2 + offset]
+        snipers = ((bb[3 + offset] | queens) & orthogonal_rays[king_sq]) | \
+                  ((bb[4 + offset] | queens) & diagonal_rays[king_sq])
+        for sniper in iter_squares(snipers):
+            blockers = between[king_sq][sniper] & self.occupancy[EMPTY]
+            if blockers and not blockers & (blockers - 1) and blockers & self.occupancy[color]:
+                pins[lsb(blockers)] = between[king_sq][sniper] | (1 << sniper)
+        return king_sq, check_mask, pins
+
+
+    def __masked_moves(self, p, masks):
+        """Yields the legal moves of the piece at p using the masks computed by legal_masks."""
+        moves = self.__pseudo_legal_moves(p)
+        if masks is None:
+            yield from moves
+            return
+        king_sq, check_mask, pins = masks
+        sq = p[1] * SIZE + p[0]
+        color = pieces_color[self.board[p[1]][p[0]]]
+        if sq == king_sq: #the king may not step onto an attacked square, including one behind it on a checking ray
+            enemy = inverse_color(color)
+            occupied = self.occupancy[EMPTY] ^ (1 << sq)
+            for move in moves:
+                if not self.is_attacked(move, enemy, occupied):
+                    yield move
+            return
+        allowed = check_mask & pins.get(sq, FULL)
+        for move in moves:
+            if len(move) == 4 and (move[3] == 6 or move[3] == 12):
+                #en pessant removes two pieces from a rank so discovered checks are simulated
+                self.make_move(p, move)
+                legal = not self.in_check(color)
+                self.unmake_move()
+                if legal:
+                    yield move
+            elif allowed >> (move[1] * SIZE + move[0]) & 1:
+                yield move
+
+
+    def __simulated_moves(self, p, validate=True):
+        moves = self.__pseudo_legal_moves(p)
         if validate:
             player = self.current_player
             for move in moves: #simulate to prevent moving into check
                 try:
-                    self.move(p, move, False, False)
-                    if not self.in_check(player, threats=threats):
-                        self.__undo_last_move()
+                    self.make_move(p, move)
+                    if not self.in_check(player):
+                        self.unmake_move()
                         yield move
                     else:
-                        self.__undo_last_move()
+                        self.unmake_move()
                 except Exception as e:
                     logging.exception("Failure occurred during move simulation to look for check condition.")
                     raise e
@@ -192,129 +463,358 @@ class Chess:
                 yield move
 
 
-    def compute_threat_matrix(self, player, coord=None, max_threats=1000):
+    def compute_threat_matrix(self, player):
         """
         Computes a matrix that represents the number of pieces threatening each square on the board.
-        A coordinate and maximum number of threats can be specified if the focus is a specific coordinate. This allows
-        for early return of the method as an optimization if the querying function only needs to know whether or not a
-        particular coordinate is threatened.
 
         Parameters
         ----------
         player: int
             The player being threatened (usually the current player).
-        coord: tuple
-            Return early if the threat to this coordinate is greater than max_threats.
-        max_threats: int (optional, default 1000)
-            Return early if threats to coord are greater than this.
 
         Returns
         _______
         A matrix indicating the number of threats to each coordinate on the board.
         """
-        threatened = [[0 for col in range(SIZE)] for row in range(SIZE)]
-        for move in self.__compute_threats(player):
-            if move[2]:
-                threatened[move[1]][move[0]] += 1
-                if coord == move:
-                    if threatened[coord[1]][coord[0]] > max_threats:
-                        return threatened
-        return threatened
-
-
-    def __compute_threats(self, player):
-        pieces = copy.deepcopy(self.player_pieces(inverse_color(player)))
-        for piece in pieces:
-            for move in self.valid_piece_moves(piece, False):
-                if move[2]:
-                    yield move
-        for pawn in self.player_pieces_of_type("P", inverse_color(player)):
-            for threat in self.__pawn_threats(pawn[0], pawn[1]):
-                yield threat
+        enemy = inverse_color(player)
+        return [[popcount(self.attackers((f, r), enemy)) for f in range(SIZE)] for r in range(SIZE)]
 
 
-    def in_check(self, player, threats=None):
+    def attackers(self, coord, by_color, occupied=None):
         """
-        Determines if a player is currently in check.
-        A precomputed threat matrix can be provided as an optimization.
+        Returns a bitboard of the pieces of one color that attack a coordinate, found by looking outward from the
+        coordinate with the attack tables (a piece attacks coord exactly when the same kind of piece on coord would
+        attack it back).
+
+        Parameters
+        ----------
+        coord: tuple
+            The coordinate being attacked.
+        by_color: int
+            The color of the attacking pieces.
+        occupied: int (optional)
+            An occupancy bitboard to use for sliding piece blockers instead of the current occupancy.
         """
-        k = list(self.player_pieces_of_type("K", player))[0]
-        threats = self.__compute_threats(player) if threats is None else threats
-        return (k[0], k[1], True) in threats
+        sq = coord[1] * SIZE + coord[0]
+        occupied = self.occupancy[EMPTY] if occupied is None else occupied
+        bb, offset = self.bitboards, 0 if by_color == WHITE else 6
+        queens = bb[2 + offset]
+        return (pawn_attacks[2 - by_color][sq] & bb[6 + offset]) | (knight_attacks[sq] & bb[5 + offset]) | \
+               (king_attacks[sq] & bb[1 + offset]) | (rook_attacks(sq, occupied) & (bb[3 + offset] | queens)) | \
+               (bishop_attacks(sq, occupied) & (bb[4 + offset] | queens))
 
 
-    def move(self, fromc, to, validate=True, pgn_gen=True):
-        threats = None
+    def is_attacked(self, coord, by_color, occupied=None):
+        """
+        Determines if any piece of by_color attacks a coordinate. Leaper tables are checked first and rays are only
+        walked when a matching slider sits on one of the coordinate's lines, so this costs a few lookups rather
+        than a move generation for the attacking side. An occupancy bitboard can be given to override blockers.
+        """
+        sq = coord[1] * SIZE + coord[0]
+        bb, offset = self.bitboards, 0 if by_color == WHITE else 6
+        if knight_attacks[sq] & bb[5 + offset] or pawn_attacks[2 - by_color][sq] & bb[6 + offset] or \
+                king_attacks[sq] & bb[1 + offset]:
+            return True
+        occupied = self.occupancy[EMPTY] if occupied is None else occupied
+        queens = bb[2 + offset]
+        sliders = (bb[3 + offset] | queens) & orthogonal_rays[sq]
+        if sliders and rook_attacks(sq, occupied) & sliders:
+            return True
+        sliders = (bb[4 + offset] | queens) & diagonal_rays[sq]
+        return bool(sliders and bishop_attacks(sq, occupied) & sliders)
+
+
+    def in_check(self, player):
+        """Determines if a player is currently in check."""
+        king = self.bitboards[pieces_type_map["K"][player - 1]]
+        if not king:
+            return False
+        sq = lsb(king)
+        return self.is_attacked((sq % SIZE, sq // SIZE), inverse_color(player))
+
+
+    def move(self, fromc, to=None, validate=True, pgn_gen=True):
+        """
+        Validate and apply a move, optionally recording it in the PGN move list. The move is either a from
+        coordinate and destination tuple or a single packed move (see move_encoding.py).
+        """
+        if to is None:
+            fromc, to = self.decode_move(fromc)
         if validate:
-            threats = self.compute_threat_matrix(self.current_player) if self.is_type(fromc, "K") else None
-            valid_moves = self.valid_piece_moves(fromc, True, threats) if self.color(fromc) == self.current_player else {}
+            valid_moves = self.valid_piece_moves(fromc, True) if self.color(fromc) == self.current_player else {}
             #below line used for debugging valid moves only
             #valid_moves = list(valid_moves)
         if not validate or to in valid_moves:
             if pgn_gen and validate:
-                self.__append_move_to_pgn(fromc, pgn_gen, to, validate, threats)
-            if self.is_type(fromc, "R") and fromc in rook_positions_index:
-                rook_index = rook_positions_index[fromc]
-                if self.rooks_moved[rook_index] == -1:
-                    self.rooks_moved[rook_index] = len(self.move_list)
-            elif self.is_type(fromc, "K") and fromc in king_positions:
-                king_index = king_positions.index(fromc)
-                on_move = len(self.move_list)
-                if self.kings_moved[king_index] == -1:
-                    self.kings_moved[king_index] = on_move
-                if to in king_castle_end_positions and self.kings_moved[king_index] == on_move:
-                    rook_index = king_castle_end_positions_index[to]
-                    rook_position = rook_positions[rook_index]
-                    if self.is_type(rook_position, "R") and self.color(rook_position) == self.current_player:
-                        self.rooks_moved[rook_index] = on_move
-                        self.__move_piece(rook_position, rook_castle_end_positions[rook_index])
-                        castle_pos_index = king_castle_end_positions.index(to)
-                        self.kings_castled[king_index] = on_move
-            self.__move_piece(fromc, to)
-            self.move_list.append((fromc, (to[0], to[1])))
-            if len(to) == 4:
-                self.__handle_special(fromc, to)
-            self.current_player = inverse_color(self.current_player)
-            if pgn_gen and validate:
-                self.__append_game_state_to_pgn()
+                self.apply_move(fromc, to)
+            else:
+                self.make_move(fromc, to)
         else:
             raise BadMoveException("Move is invalid")
 
 
-    def __append_move_to_pgn(self, fromc, pgn_gen, to, validate, threats):
-        pgn_castle, pgn_promotion, file_disambiguation, rank_disambiguation = None, "", "", ""
-        if self.is_type(fromc, "K") and fromc in king_positions:
-            if to in king_castle_end_positions:
-                castle_pos_index = king_castle_end_positions.index(to)
-                pgn_castle = "O-O-O " if castle_pos_index == 0 or castle_pos_index == 2 else "O-O "
-        to_color = self.color(to)
-        capture_str = "x" if to_color != EMPTY else ""
-        if pgn_castle is not None:
-            pgn = pgn_castle
+    def apply_move(self, fromc, to):
+        """
+        Apply a move already known to be legal (e.g. from resolve_san) and record it in the PGN move list, without
+        validating it again.
+        """
+        self.__append_move_to_pgn(fromc, to)
+        self.make_move(fromc, to)
+        self.__append_game_state_to_pgn()
+
+
+    def make_move(self, fromc, to=None):
+        """
+        Apply a move without validating it or generating PGN text. Every effect of the move (captures, castling
+        rights, en pessant target, promotion) is recorded so that unmake_move can restore the previous position
+        exactly, which lets tree searches walk a single board instead of cloning one per node.
+
+        Parameters
+        ----------
+        fromc: tuple or int
+            The coordinate of the piece being moved, or a packed move if to is omitted.
+        to: tuple
+            The destination as produced by the move generators, i.e. (file, rank, threat) with an optional
+            fourth element for promotions and en pessant captures.
+        """
+        if to is None:
+            fromc, to = self.decode_move(fromc)
+        on_move = len(self.move_list)
+        self.state_history.append((self.en_passant, self.zobrist_key, self.half_move_clock))
+        state_key = castling_keys[self.castling_rights()] ^ self.__en_passant_key()
+        piece = self.board[fromc[1]][fromc[0]]
+        to_coord = (to[0], to[1])
+        if to_coord in rook_positions_index: #capturing a rook on its home square removes the castling right
+            rook_index = rook_positions_index[to_coord]
+            if self.rooks_moved[rook_index] == -1 and self.board[to[1]][to[0]] != EMPTY:
+                self.rooks_moved[rook_index] = on_move
+        if piece in pieces_type_map["R"] and fromc in rook_positions_index:
+            rook_index = rook_positions_index[fromc]
+            if self.rooks_moved[rook_index] == -1:
+                self.rooks_moved[rook_index] = on_move
+        elif piece in pieces_type_map["K"] and fromc == king_positions[self.current_player - 1]:
+            king_index = self.current_player - 1
+            if self.kings_moved[king_index] == -1:
+                self.kings_moved[king_index] = on_move
+            if to in king_castle_end_positions and self.kings_moved[king_index] == on_move:
+                rook_index = king_castle_end_positions_index[to]
+                rook_position = rook_positions[rook_index]
+                if self.is_type(rook_position, "R") and self.color(rook_position) == self.current_player:
+                    self.rooks_moved[rook_index] = on_move
+                    self.__move_piece(rook_position, rook_castle_end_positions[rook_index])
+                    self.kings_castled[king_index] = on_move
+        self.__move_piece(fromc, to)
+        self.move_list.append((fromc, to_coord))
+        if len(to) == 4:
+            self.__handle_special(fromc, to)
+        if piece in pieces_type_map["P"] and abs(to[1] - fromc[1]) == 2:
+            self.en_passant = (to[0], (to[1] + fromc[1]) // 2)
         else:
-            pgn_type = pieces[self.get_coord(fromc)].upper()
-            piece_type = self.get_coord(fromc)
-            # TODO piece disambiguation if same type of piece can move to to_coord
-            for piece in self.__type_in_coords(self.player_pieces_list[self.current_player - 1], piece_type):
-                if self.board[piece[1]][piece[0]] == piece_type and piece != fromc:
-                    for move in self.valid_piece_moves(piece, threats=threats):
-                        if move == to:
-                            if piece[0] == fromc[0]:
-                                rank_disambiguation = str(fromc[1] + 1)
-                            else:
-                                file_disambiguation = index_to_file(fromc[0])
-            notation_coord = coord_to_notation(to)
-            if pgn_type == "P":
-                if len(to) == 4 and to[3] != 6 and to[3] != 12:
-                    pgn_promotion = "=" + to[3].upper()
-                if capture_str != "":
-                    pgn = index_to_file(fromc[0]) + capture_str + notation_coord + pgn_promotion
-                else:
-                    pgn = notation_coord + pgn_promotion
+            self.en_passant = None
+        if piece in pieces_type_map["P"] or on_move in self.captured_pieces:
+            self.half_move_clock = 0
+        else:
+            self.half_move_clock += 1
+        self.current_player = inverse_color(self.current_player)
+        self.zobrist_key ^= state_key ^ castling_keys[self.castling_rights()] ^ self.__en_passant_key() ^ side_key
+
+
+    def unmake_move(self):
+        """
+        Revert the last move applied by make_move (or move), restoring captured pieces, castling rights, the en
+        pessant target and promoted pawns. PGN text generated for the move is not removed.
+        """
+        last_move = self.move_list.pop()
+        last_move_index = len(self.move_list)
+        captured = self.captured_pieces.pop(last_move_index, None)
+        self.en_passant, zobrist_key, self.half_move_clock = self.state_history.pop()
+        self.current_player = inverse_color(self.current_player)
+        if last_move_index in self.promoted_pieces:
+            self.set_coord(last_move[1], 6 if self.current_player == WHITE else 12)
+            self.promoted_pieces.pop(last_move_index)
+        for rook_index in range(len(rook_positions)):
+            if self.rooks_moved[rook_index] == last_move_index:
+                self.rooks_moved[rook_index] = -1
+        king_index = self.current_player - 1
+        if self.kings_moved[king_index] == last_move_index:
+            self.kings_moved[king_index] = -1
+        if self.kings_castled[king_index] == last_move_index: #undo castle
+            rook_index = king_castle_end_positions_index[(last_move[1][0], last_move[1][1], False)]
+            rook_pos = rook_castle_end_positions[rook_index]
+            self.__move_piece((rook_pos[0], rook_pos[1]), rook_positions[rook_index])
+            self.kings_castled[king_index] = -1
+        self.__move_piece(last_move[1], last_move[0])
+        if captured is not None:
+            self.set_coord(captured[1], captured[0])
+        self.zobrist_key = zobrist_key
+
+
+    def decode_move(self, move):
+        """Unpack a move (see move_encoding.py) into the from coordinate and destination tuple used by move."""
+        fromc = square_coords[move & 63]
+        f, r = square_coords[move >> 6 & 63]
+        flag = move >> 12 & 3
+        if flag == NORMAL_MOVE:
+            pawn_push = self.board[fromc[1]][fromc[0]] in pieces_type_map["P"] and f == fromc[0]
+            return fromc, (f, r, not pawn_push)
+        if flag == CASTLE:
+            return fromc, (f, r, False)
+        if flag == EN_PASSANT:
+            return fromc, (f, r, False, self.board[fromc[1]][fromc[0]])
+        promotion = promotion_types[move >> 14]
+        return fromc, (f, r, f != fromc[0], promotion if r == SIZE - 1 else promotion.lower())
+
+
+    def move_from_uci(self, uci):
+        """Pack a move given in UCI long algebraic notation (e.g. e2e4, e7e8q) for the current position."""
+        from_sq, to_sq = square_names_index[uci[0:2]], square_names_index[uci[2:4]]
+        fromc, to = square_coords[from_sq], square_coords[to_sq]
+        piece = self.board[fromc[1]][fromc[0]]
+        if len(uci) > 4:
+            return encode(from_sq, to_sq, PROMOTION, promotion_types_index[uci[4].upper()])
+        if piece in pieces_type_map["K"] and abs(to[0] - fromc[0]) == 2:
+            return encode(from_sq, to_sq, CASTLE)
+        if piece in pieces_type_map["P"] and to[0] != fromc[0] and self.board[to[1]][to[0]] == EMPTY:
+            return encode(from_sq, to_sq, EN_PASSANT)
+        return encode(from_sq, to_sq)
+
+
+    def move_from_san(self, san):
+        """Pack a move given in standard algebraic notation (e.g. Nbd7, exd6, e8=Q+, O-O) for the current position."""
+        match = san_regex.match(san.strip())
+        if match is None:
+            raise BadMoveException("Unreadable SAN move: " + san)
+        queen_side, king_side, piece_type, from_file, from_rank, to_notation, promotion = match.groups()
+        if queen_side or king_side:
+            king = king_positions[self.current_player - 1]
+            return encode_tuple(king, (2 if queen_side else 6, king[1], False))
+        resolved = self.resolve_san(piece_type or "P", rank_file_to_coord(to_notation),
+                                    file_to_index(from_file) if from_file else None,
+                                    int(from_rank) - 1 if from_rank else None, promotion)
+        if resolved is None:
+            raise BadMoveException("No legal move matches " + san)
+        return encode_tuple(*resolved)
+
+
+    def resolve_san(self, piece_type, to, from_file=None, from_rank=None, promotion=None):
+        """
+        Find the legal move of the current player described by the parts of a SAN move. The candidate origins are
+        found by looking back from the destination with the attack tables (and one or two squares behind it for pawn
+        pushes), so only those pieces are checked for legality instead of generating the moves of every piece of
+        the type.
+
+        Parameters
+        ----------
+        piece_type: str
+            The type of the moving piece (K, Q, R, B, N or P, either case).
+        to: tuple
+            The destination coordinate.
+        from_file: int (optional)
+            The file the piece has to come from (file disambiguation, or the file of a capturing pawn).
+        from_rank: int (optional)
+            The rank the piece has to come from (rank disambiguation).
+        promotion: str (optional)
+            The piece type a pawn promotes to, a queen when a pawn reaching the last rank does not say.
+
+        Returns
+        _______
+        A (from coordinate, destination tuple) pair ready for move, or None if no legal move matches.
+        """
+        player, enemy = self.current_player, inverse_color(self.current_player)
+        f, r = to[0], to[1]
+        sq = r * SIZE + f
+        if self.occupancy[player] >> sq & 1:
+            return None
+        piece_type = piece_type.upper()
+        own = self.bitboards[pieces_type_map[piece_type][player - 1]]
+        capture = bool(self.occupancy[enemy] >> sq & 1)
+        special = None
+        if piece_type == "P":
+            step = 1 if player == WHITE else -1
+            en_passant = (f, r) == self.en_passant
+            if capture or en_passant:
+                candidates = pawn_attacks[2 - player][sq] & own
+            elif 0 < r - step < SIZE - 1:
+                back = sq - step * SIZE
+                candidates = own & (1 << back)
+                if not candidates and r == (3 if player == WHITE else 4) and not self.occupancy[EMPTY] >> back & 1:
+                    candidates = own & (1 << (back - step * SIZE))
+            else:
+                candidates = 0
+            if r == (SIZE - 1 if player == WHITE else 0):
+                special = (promotion or "Q").upper() if player == WHITE else (promotion or "Q").lower()
+            elif promotion is not None:
+                return None
+        elif piece_type == "K":
+            candidates = king_attacks[sq] & own
+            king = king_positions[player - 1]
+            if not candidates and r == king[1] and (f == 2 or f == 6) and own >> (king[1] * SIZE + king[0]) & 1:
+                castle = (f, r, False)
+                return (king, castle) if castle in self.valid_piece_moves(king) else None
+        else:
+            candidates = self.attackers(to, player) & own
+        if from_file is not None:
+            candidates &= 0x0101010101010101 << from_file
+        if from_rank is not None:
+            candidates &= 0xFF << (from_rank * SIZE)
+        if not candidates:
+            return None
+        king_sq, check_mask, pins = self.legal_masks(player) or (None, FULL, {})
+        for origin in iter_squares(candidates):
+            fromc = square_coords[origin]
+            if piece_type == "P" and not capture and fromc[0] != f: #en pessant, simulated like in __masked_moves
+                move = (f, r, False, self.board[fromc[1]][fromc[0]])
+                self.make_move(fromc, move)
+                legal = not self.in_check(player)
+                self.unmake_move()
             else:
-                pgn = pgn_type + file_disambiguation + rank_disambiguation + capture_str + notation_coord
+                move = (f, r, piece_type != "P" or capture) + ((special,) if special is not None else ())
+                if origin == king_sq:
+                    legal = not self.is_attacked(to, enemy, self.occupancy[EMPTY] ^ (1 << origin))
+                else:
+                    legal = (check_mask & pins.get(origin, FULL)) >> sq & 1
+            if legal:
+                return fromc, move
+        return None
+
+
+    def san(self, fromc, to):
+        """Return the standard algebraic notation of a move in the current position (without check annotations)."""
+        if self.is_type(fromc, "K") and fromc in king_positions and to in king_castle_end_positions:
+            castle_pos_index = king_castle_end_positions.index(to)
+            return "O-O-O" if castle_pos_index == 0 or castle_pos_index == 2 else "O-O"
+        file_disambiguation, rank_disambiguation = "", ""
+        en_passant = len(to) == 4 and (to[3] == 6 or to[3] == 12)
+        capture_str = "x" if self.color(to) != EMPTY or en_passant else ""
+        piece_type = self.get_coord(fromc)
+        pgn_type = pieces[piece_type].upper()
+        notation_coord = coord_to_notation(to)
+        if pgn_type == "P":
+            pgn_promotion = "=" + to[3].upper() if len(to) == 4 and not en_passant else ""
+            if capture_str != "":
+                return index_to_file(fromc[0]) + capture_str + notation_coord + pgn_promotion
+            return notation_coord + pgn_promotion
+        #other pieces of the type that attack the destination and are not pinned off the line to it
+        from_sq, to_sq = fromc[1] * SIZE + fromc[0], to[1] * SIZE + to[0]
+        others = self.attackers(to, pieces_color[piece_type]) & self.bitboards[piece_type] & ~(1 << from_sq)
+        if others:
+            masks = self.legal_masks(pieces_color[piece_type])
+            pins = masks[2] if masks is not None else {}
+            for sq in iter_squares(others):
+                if pins.get(sq, FULL) >> to_sq & 1:
+                    if sq % SIZE == fromc[0]:
+                        rank_disambiguation = str(fromc[1] + 1)
+                    else:
+                        file_disambiguation = index_to_file(fromc[0])
+        return pgn_type + file_disambiguation + rank_disambiguation + capture_str + notation_coord
+
+
+    def __append_move_to_pgn(self, fromc, to):
+        pgn = self.san(fromc, to)
         if self.current_player == WHITE:
             self.pgn_str.append(str(self.__get_full_move_clock()) + ".")
+        elif not self.pgn_str: #game loaded from a FEN with black to move
+            self.pgn_str.append(str(self.__get_full_move_clock()) + "...")
         self.pgn_str.append(pgn)
 
 
@@ -339,62 +839,45 @@ class Chess:
 
 
     def __move_piece(self, fromc, to):
-        from_color = self.color(fromc)
-        to_color = self.color(to)
-        if to_color != EMPTY:
-            captured = (to[0], to[1])
-            self.captured_pieces[len(self.move_list)] = (self.board[to[1]][to[0]], captured)
-            self.player_pieces_list[to_color - 1].remove(captured)
-        self.player_pieces_list[from_color - 1].remove(fromc)
-        self.player_pieces_list[from_color - 1].add((to[0], to[1]))
-        self.board[to[1]][to[0]] = self.board[fromc[1]][fromc[0]]
+        piece = self.board[fromc[1]][fromc[0]]
+        captured_piece = self.board[to[1]][to[0]]
+        from_sq, to_sq = fromc[1] * SIZE + fromc[0], to[1] * SIZE + to[0]
+        from_bit, to_bit = 1 << from_sq, 1 << to_sq
+        if captured_piece != EMPTY:
+            self.captured_pieces[len(self.move_list)] = (captured_piece, (to[0], to[1]))
+            self.bitboards[captured_piece] ^= to_bit
+            self.occupancy[pieces_color[captured_piece]] ^= to_bit
+            self.occupancy[EMPTY] ^= to_bit
+            self.zobrist_key ^= piece_keys[captured_piece][to_sq]
+            self.piece_counts[captured_piece] -= 1
+            self.piece_counts[EMPTY] += 1
+        self.zobrist_key ^= piece_keys[piece][from_sq] ^ piece_keys[piece][to_sq]
+        if self.score_tables is not None:
+            material, positional = self.score_tables
+            table = positional[piece]
+            self.material -= material[captured_piece]
+            self.positional += table[to_sq] - table[from_sq] - positional[captured_piece][to_sq]
+        move_bits = from_bit | to_bit
+        self.bitboards[piece] ^= move_bits
+        self.occupancy[pieces_color[piece]] ^= move_bits
+        self.occupancy[EMPTY] ^= move_bits
+        self.board[to[1]][to[0]] = piece
         self.board[fromc[1]][fromc[0]] = EMPTY
 
 
-    def __undo_last_move(self):
-        last_move = self.move_list.pop()
-        last_move_type = self
-        last_move_index = len(self.move_list)
-        captured = self.captured_pieces.pop(last_move_index, None)
-        self.current_player = inverse_color(self.current_player)
-        if self.is_type(last_move[1], "R") and last_move[0] in rook_positions:
-            if self.rooks_moved[rook_positions_index[last_move[0]]] == last_move_index:
-                self.rooks_moved[rook_positions_index[last_move[0]]] = -1
-        elif self.is_type(last_move[1], "K") and last_move[0] in king_positions:
-            if self.kings_moved[king_positions.index(last_move[0])] == last_move_index:
-                self.kings_moved[king_positions.index(last_move[0])] = -1
-                king_pos = (last_move[1][0], last_move[1][1], False)
-                #if king_pos in king_castle_end_positions: #XXX use self.king_castled instead
-                if last_move_index in self.kings_castled: #undo castle
-                    rook_index = king_castle_end_positions_index[king_pos]
-                    king_index = self.current_player - 1
-                    rook_pos = rook_castle_end_positions[rook_index]
-                    self.__move_piece((rook_pos[0], rook_pos[1]), rook_positions[rook_index])
-                    self.rooks_moved[rook_index] = -1
-                    self.kings_castled[king_index] = -1
-        elif last_move_index in self.promoted_pieces:
-            self.board[last_move[1][1]][last_move[1][0]] = 6 if self.current_player == WHITE else 12
-            self.promoted_pieces.pop(last_move_index)
-        self.__move_piece(last_move[1], last_move[0])
-        if captured is not None:
-            self.board[captured[1][1]][captured[1][0]] = captured[0]
-            self.player_pieces_list[self.color(captured[1]) - 1].add(captured[1])
-
     def __handle_special(self, fromc, to):
         """Handles one-off move types like en pessant and pawn promotion when applying a move."""
         if to[3] == 6 or to[3] == 12: #en pessant
             captured = (to[0], fromc[1])
-            captured_color = self.color(captured)
             self.captured_pieces[len(self.move_list) - 1] = (self.board[captured[1]][captured[0]], captured)
-            self.board[captured[1]][captured[0]] = EMPTY
-            self.player_pieces_list[captured_color - 1].remove(captured)
+            self.set_coord(captured, EMPTY)
         else: #promotion
             promotion_type = to[3]
             if promotion_type.upper() in promotion_candidates and self.is_type(to, "P"):
                 if self.current_player == WHITE and to[1] == 7:
-                    self.board[to[1]][to[0]] = pieces_index[promotion_type.upper()]
+                    self.set_coord(to, pieces_index[promotion_type.upper()])
                 elif self.current_player == BLACK and to[1] == 0:
-                    self.board[to[1]][to[0]] = pieces_index[promotion_type.lower()]
+                    self.set_coord(to, pieces_index[promotion_type.lower()])
                 else:
                     raise BadPromotionException("Cannot promote from this position")
                 self.promoted_pieces[len(self.move_list)-1] = (self.board[to[1]][to[0]], to)
@@ -402,19 +885,18 @@ class Chess:
                 raise BadPromotionException("Invalid promotion")
 
 
-    def __pawn_threats(self, f, r):
-        color = self.color((f, r))
-        for threat in self.__warps([], (f, r), pawn_capture_warps[color - 1], (color,)):
-            yield threat
-
-
     def __pawn(self, f, r):
         """Returns all valid moves for a pawn at file f and rank r including en pessant and valid promotions."""
         color = self.color((f, r))
-        warps = [[(0, 1), (0, 2)] if r == 1 and self.color((f, r + 1)) == EMPTY else [(0, 1)]]
-        warps.append([(0, -1), (0, -2)] if r == 6 and self.color((f, r - 1)) == EMPTY else [(0, -1)])
-        moves = self.__warps([], (f, r), warps[color - 1], (WHITE, BLACK), False)
-        for move in self.__warps(moves, (f, r), pawn_capture_warps[color - 1], (EMPTY, color)):
+        occupied = self.occupancy[EMPTY]
+        step = 1 if color == WHITE else -1
+        moves = []
+        if not occupied >> ((r + step) * SIZE + f) & 1:
+            moves.append((f, r + step, False))
+            if r == (1 if color == WHITE else 6) and not occupied >> ((r + 2 * step) * SIZE + f) & 1:
+                moves.append((f, r + 2 * step, False))
+        not_enemy = ~self.occupancy[inverse_color(color)]
+        for move in self.__leaps(pawn_capture_moves[color - 1][r * SIZE + f], not_enemy, moves):
             if color == WHITE and move[1] == 7:
                 for promotion in promotion_candidates:
                     yield (move[0], move[1], move[2], promotion)
@@ -423,15 +905,9 @@ class Chess:
                     yield (move[0], move[1], move[2], promotion.lower())
             else:
                 yield move
-        if len(self.move_list) > 0: #en pessant - check that last move was a double pawn advance
-            last_move = self.move_list[-1]
-            piece_type = self.board[last_move[1][1]][last_move[1][0]]
-            if (piece_type == 6 or piece_type == 12) and self.color(last_move[1]) == inverse_color(color):
-                if abs(last_move[1][1] - last_move[0][1]) == 2 and abs(last_move[0][0] - f) == 1 and last_move[1][1] == r:
-                    if color == 2:
-                        yield (last_move[0][0], r - 1, False, self.board[r][f])
-                    else:
-                        yield (last_move[0][0], r + 1, False, self.board[r][f])
+        ep = self.en_passant
+        if ep is not None and ep[1] == r + step and abs(ep[0] - f) == 1 and color == self.current_player:
+            yield (ep[0], ep[1], False, self.board[r][f])
 
 
     def __rook(self, f, r):
@@ -446,7 +922,7 @@ class Chess:
 
     def __knight(self, f, r):
         """Returns all valid moves for a knight at file f and rank r."""
-        return self.__warps([], (f, r), knight_warps, (self.color((f, r)),))
+        return self.__leaps(knight_moves[r * SIZE + f], self.occupancy[self.color((f, r))])
 
 
     def __queen(self, f, r):
@@ -454,49 +930,67 @@ class Chess:
         return self.__orthogonal(self.__diagonal([], f, r), f, r)
 
 
-    def __king(self, f, r, threats=None):
-        """Returns all valid moves for a king at file f and rank r including castling (does not allow king to move into check or checkmate)."""
+    def __king(self, f, r):
+        """Returns all valid moves for a king at file f and rank r including castling (does not allow king to castle out of, through or into check)."""
         color = self.color((f, r))
         castle_moves = []
-        if self.kings_moved[color - 1] == -1:
-            if self.rooks_moved[0 if color == WHITE else 2] == -1 and self.__positions_clear([(2, r), (3, r)], threats):
+        if self.kings_moved[color - 1] == -1 and (f, r) == king_positions[color - 1]:
+            enemy = inverse_color(color)
+            rooks = self.bitboards[pieces_type_map["R"][color - 1]]
+            if not self.is_attacked((f, r), enemy):
+                if self.rooks_moved[0 if color == WHITE else 2] == -1 and rooks >> (r * SIZE) & 1 and \
+                        self.__positions_clear([(1, r), (2, r), (3, r)], [(2, r), (3, r)], enemy):
                     castle_moves.append((2, r, False))
-            if self.rooks_moved[1 if color == WHITE else 3] == -1 and self.__positions_clear([(5, r), (6, r)], threats):
-                castle_moves.append((6, r, False))
-        for move in self.__warps(castle_moves, (f, r), king_warps, (color,)):
-            yield move
+                if self.rooks_moved[1 if color == WHITE else 3] == -1 and rooks >> (r * SIZE + 7) & 1 and \
+                        self.__positions_clear([(5, r), (6, r)], [(5, r), (6, r)], enemy):
+                    castle_moves.append((6, r, False))
+        return self.__leaps(king_moves[r * SIZE + f], self.occupancy[color], castle_moves)
 
 
-    def __positions_clear(self, coords, threats=None):
+    def __positions_clear(self, coords, king_path, enemy):
         """
-        Determines if all coordinates in coords list are clear of both pieces and threats.
+        Determines if all coordinates in coords list are clear of pieces and the king's path is clear of threats.
 
         Parameters
         ----------
         coords: list of tuples
-            A list of coordinates to check for pieces and threats
-        threats: matrix object
-            A board matrix containing the number of threats per square
+            A list of coordinates to check for pieces
+        king_path: list of tuples
+            A list of coordinates the king crosses or lands on, which must not be threatened
+        enemy: int
+            The color of the threatening player
 
         Returns
         _______
-        True if none of the coords contain a piece or are threatened, False otherwise.
+        True if none of the coords contain a piece and no king_path coord is threatened, False otherwise.
         """
         for coord in coords:
-            status = 0 if threats is None else threats[coord[1]][coord[0]]
-            if self.board[coord[1]][coord[0]] != 0 or status != 0:
+            if self.board[coord[1]][coord[0]] != EMPTY:
+                return False
+        for coord in king_path:
+            if self.is_attacked(coord, enemy):
                 return False
         return True
 
 
-    def __warps(self, moves, coord, relative_warps, excluded, threat=True):
-        #Warps can result in capturing the piece at the destination, so threat is True
+    def __leaps(self, leaper_moves, excluded, moves=()):
+        """
+        Filter a precomputed leaper table entry (see attacks.py) against a mask of excluded destination squares.
+
+        Parameters
+        ----------
+        leaper_moves: tuple of (square, move) pairs
+            The attack table entry for the origin square (e.g. knight_moves[square]).
+        excluded: int
+            A bitboard of squares the piece may not land on (usually squares occupied by its own color).
+        moves: list of tuples
+            A set of moves to yield before the leaper moves.
+        """
         for move in moves:
             yield move
-        for w in relative_warps:
-            warp = (coord[0] + w[0], coord[1] + w[1], threat)
-            if warp[0] < 8 and warp[0] >= 0 and warp[1] < 8 and warp[1] >= 0 and self.color(warp) not in excluded:
-                yield warp
+        for sq, move in leaper_moves:
+            if not excluded >> sq & 1:
+                yield move
 
 
     def __orthogonal(self, moves, f, r):
@@ -517,7 +1011,7 @@ class Chess:
         moves: list of tuples
             The input list of moves with orthogonal moves appended to it.
         """
-        return self.__vectors(moves, f, r, [(1, 0), (-1, 0), (0, 1), (0, -1)])
+        return self.__vectors(moves, f, r, orthogonal_directions)
 
 
     def __diagonal(self, moves, f, r):
@@ -538,13 +1032,14 @@ class Chess:
         moves: list of tuples
             The input list of moves with diagonal moves appended to it.
         """
-        return self.__vectors(moves, f, r, [(1, 1), (-1, -1), (1, -1), (-1, 1)])
+        return self.__vectors(moves, f, r, diagonal_directions)
     
 
-    def __vectors(self, moves, f, r, offsets_list):
+    def __vectors(self, moves, f, r, direction_list):
         """
         Generates moves going in a list of vectors from a starting position until
-        either the edge of the board or another piece is encountered.
+        either the edge of the board or another piece is encountered. Moves are sliced
+        from the precomputed ray tables up to the nearest blocker on each ray.
 
         Parameters
         ----------
@@ -555,9 +1050,9 @@ class Chess:
         r: int
             The current rank of the piece.
 
-        offsets_list: list of tuples
-            A list of vectors to travel in (e.g. if start is (0,0) and vector is (1,1)
-            move set will be (0,0), (1,1), (2,2), (3,3), etc.
+        direction_list: list of ints
+            A list of ray directions to travel in (see attacks.directions, e.g. if start is (0,0)
+            and direction is NORTH_EAST move set will be (1,1), (2,2), (3,3), etc.
             
         Returns
         _______
@@ -566,21 +1061,17 @@ class Chess:
         """
         for move in moves:
             yield move
-        color = self.color((f, r))
-        inv_color = inverse_color(color)
-        for offset in offsets_list:
-            coord = (f + offset[1], r + offset[0], True)
-            while coord[0] < 8 and coord[0] >= 0 and coord[1] < 8 and coord[1] >= 0 and self.color(coord) in (inv_color, EMPTY):
-                yield coord
-                if self.color(coord) == inv_color:
-                    break
-                coord = (offset[1] + coord[0], offset[0] + coord[1], coord[2])
-
-
-    def __type_in_coords(self, coords, type):
-        for coord in coords:
-            if self.board[coord[1]][coord[0]] == type:
-                yield coord
+        sq = r * SIZE + f
+        own = self.occupancy[self.color((f, r))]
+        occupied = self.occupancy[EMPTY]
+        for direction in direction_list:
+            blockers = rays[direction][sq] & occupied
+            if blockers:
+                blocker = lsb(blockers) if positive_directions[direction] else msb(blockers)
+                reach = square_distance[sq][blocker] - (own >> blocker & 1)
+                yield from ray_moves[direction][sq][:reach]
+            else:
+                yield from ray_moves[direction][sq]
 
 
     def __str__(self):
@@ -604,50 +1095,23 @@ class Chess:
                 hash.append(pieces[p_type])
         hash.append(" w " if self.current_player == WHITE else " b ")
         hash_len = len(hash)
-        if self.kings_moved[0] == -1:
-            if self.rooks_moved[0] == -1:
-                hash.append("K")
-            if self.rooks_moved[1] == -1:
-                hash.append("Q")
-        if self.kings_moved[1] == -1:
-            if self.rooks_moved[2] == -1:
-                hash.append("k")
-            if self.rooks_moved[3] == -1:
-                hash.append("q")
+        for rook_index in (1, 0, 3, 2): #KQkq
+            if self.kings_moved[rook_index // 2] == -1 and self.rooks_moved[rook_index] == -1:
+                hash.append(castling_letters[rook_index])
         if len(hash) == hash_len: #nothing new appeneded for castling
             hash.append("-")
-        if len(self.move_list) > 0:
-            last_move = self.move_list[-1]
-            if self.is_type(last_move[1], "P") and abs(last_move[1][1] - last_move[0][1]) == 2: #en pessant target
-                behind_rank = last_move[1][1] - (-1 if self.current_player == WHITE else 1) #reversed for opponents pawn
-                hash.append(" " + coord_to_notation((last_move[1][0], behind_rank)) + " ")
-            else:
-                hash.append(" - ")
+        if self.en_passant is not None:
+            hash.append(" " + coord_to_notation(self.en_passant) + " ")
         else:
             hash.append(" - ")
-        hash.append(str(self.__get_half_move_clock()))
+        hash.append(str(self.half_move_clock))
         full_moves = self.__get_full_move_clock()
         hash.append(" " + str(full_moves))
         return "".join(hash)
 
 
     def __get_full_move_clock(self):
-        return math.floor(len(self.move_list) / 2) + 1
-
-
-    def __get_half_move_clock(self):
-        move_index = len(self.move_list)
-        if move_index > 0:
-            last_cap_or_pawn = move_index
-            while last_cap_or_pawn:
-                if (last_cap_or_pawn - 1) in self.captured_pieces:
-                    break
-                if self.is_type(self.move_list[last_cap_or_pawn - 1][1], "P"):
-                    break
-                last_cap_or_pawn -= 1
-            return move_index - last_cap_or_pawn
-        else:
-            return 0
+        return (self.start_ply + len(self.move_list)) // 2 + 1
 
 
     def pgn(self):
@@ -1,24 +1,41 @@
-from lark import Lark, Transformer, v_args
+"""
+Lark grammar for PGN.
+
+The grammar is parsed with Lark's LALR parser and contextual lexer (it still works with the Earley parser). Its two
+shift/reduce conflicts are resolved by shifting: a numbered continuation ("4. d3 {...} 4...e6") continues the turn
+rather than starting a new one, and "=" followed by a piece letter is a promotion rather than an evaluation.
+
+Nothing is built at import. The parser is made on first use and its tables are pickled to a cache file, so later
+processes load them instead of analysing the grammar again. The file name contains a hash of the grammar and the Lark
+version, so a stale cache is never loaded. The cache can be prebuilt with:
+
+    python -m pyanchetto.chess_parser
+"""
+import hashlib
 import os
+import argparse
+import pickle
+import tempfile
+
+from pyanchetto.pgn_reader import open_pgn, read_games
 
 #TODO: draw, draw offered, en passant, knight as "S"?, only move available
-grammar = """
+grammar = r"""
     start: pgn
     
     pgn: metadata* turn* outcome?
     
-    metadata: "[" WORD ESCAPED_STRING "]" NEWLINE
+    metadata: "[" WORD ESCAPED_STRING "]"
 
-    turn: (move_number move " "? anno_glyph? inline_comment?) (move_number? move " "? anno_glyph? inline_comment?)?
+    turn: (move_number move anno_glyph? inline_comment?) (move_number? move anno_glyph? inline_comment?)?
             
-    move: piece_type disambiguation? capture? coord move_modifiers?
-        | file capture? coord promotion? move_modifiers?
-        | coord promotion? move_modifiers?
-        | king_side_castle move_modifiers?
-        | queen_side_castle move_modifiers?
-        | queen_side_castle move_modifiers?
+    move: piece_type disambiguation? capture? coord move_modifiers
+        | file capture? coord promotion? move_modifiers
+        | coord promotion? move_modifiers
+        | king_side_castle move_modifiers
+        | queen_side_castle move_modifiers
     
-    move_number: " "? INT "."* " "?
+    move_number: INT "."*
     
     piece_type: "K" -> k | "Q" -> q | "R" -> r | "B" -> b | "N" -> n | "P" -> p 
     
@@ -28,7 +45,7 @@ grammar = """
             
     file: "a".."h"
                          
-    rank: "1".."8"
+    rank: RANK
                 
     king_side_castle: "O-O" | "0-0"
     
@@ -55,21 +72,85 @@ grammar = """
     outcome: "1-0" -> white_win | "1/2-1/2" -> draw | "0-1" -> black_win
     
     inline_comment: /\{[^\}]*\}/s 
+
+    //lookaheads instead of terminal priorities (which the Earley lexer does not support) keep move numbers, ranks,
+    //castling with zeros and results apart in the contextual lexer
+    INT: /[0-9]+(?![0-9a-hx\/\-])/
+    RANK: /[1-8](?![0-9.\/\-])/
             
-    %import common.INT 
     %import common.WORD   
     %import common.WS
-    %import common.NEWLINE
     %import common.ESCAPED_STRING
     %ignore WS 
 """
 
-parser = Lark(grammar)
+PARSER_OPTIONS = {"parser": "lalr", "lexer": "contextual"}
+CACHE_DIR = os.environ.get("PYANCHETTO_CACHE") or \
+    os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "pyanchetto")
+_parser = None
+
+def cache_file(cache_dir=CACHE_DIR):
+    """The path of the serialized parser for this grammar and Lark version."""
+    import lark
+    key = repr((grammar, sorted(PARSER_OPTIONS.items()), lark.__version__)).encode("utf-8")
+    return os.path.join(cache_dir, "chess_parser-" + hashlib.sha256(key).hexdigest()[:16] + ".pickle")
+
+def get_parser(cache_dir=CACHE_DIR):
+    """The Lark parser for grammar, loaded from the cache or built (and cached) the first time it is needed."""
+    global _parser
+    if _parser is None:
+        _parser = load_parser(cache_dir)
+    return _parser
+
+def load_parser(cache_dir=CACHE_DIR):
+    """Unpickle the parser from cache_dir, or build it and try to write the cache file (failing silently)."""
+    from lark import Lark
+    from lark.grammar import Rule
+    from lark.lexer import TerminalDef
+    file_name = cache_file(cache_dir)
+    try:
+        with open(file_name, "rb") as file:
+            data, memo = pickle.load(file)
+        return Lark.deserialize(data, {"Rule": Rule, "TerminalDef": TerminalDef}, memo)
+    except Exception: #missing or unreadable, rebuild it
+        pass
+    parser = Lark(grammar, **PARSER_OPTIONS)
+    temp_name = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        #written under a temporary name and renamed, so concurrent processes never read a partial file
+        descriptor, temp_name = tempfile.mkstemp(dir=cache_dir)
+        with os.fdopen(descriptor, "wb") as file:
+            pickle.dump(parser.memo_serialize([TerminalDef, Rule]), file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_name, file_name)
+    except OSError:
+        if temp_name is not None and os.path.exists(temp_name):
+            os.remove(temp_name)
+    return parser
 
 def parse_file(file_name):
-    with open(file_name, "r") as file:
+    with open_pgn(file_name) as file:
         data = file.read()
         return parse_notation(data)
 
+def parse_games(file_name):
+    """Parse a multi-game (and possibly compressed) PGN file one game at a time, see pgn_reader.py."""
+    for game in read_games(file_name):
+        yield parse_notation(game)
+
 def parse_notation(move_string):
-    return parser.parse(move_string)
+    return get_parser().parse(move_string)
+
+def parse_args():
+    """Parse arguments from the command line."""
+    parser = argparse.ArgumentParser(description="Build the PGN parser cache.")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="Directory of the cache file (defaults to $PYANCHETTO_CACHE or ~/.cache/pyanchetto).", required=False)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    get_parser(args.cache_dir)
+    print(cache_file(args.cache_dir))
+
+if __name__ == "__main__":
+    main()
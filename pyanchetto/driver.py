@@ -2,14 +2,14 @@ import logging
 import argparse
 from pyanchetto.chess import Chess
 from pyanchetto.pgn_interpreter import ChessInterpreter
-from pyanchetto.pgn_parser import parse_notation
+from pyanchetto.pgn_parser import parse_games
 
 ENCODE_IN = 'utf-8'
 
 def parse_args():
     """Parse arguments from the command line."""
     parser = argparse.ArgumentParser(description="A cube solver in python.")
-    parser.add_argument('-p', '--pgn', type=str, help="An input file containing a pgn notation.", required=False)
+    parser.add_argument('-p', '--pgn', type=str, help="An input file containing one or more games in pgn notation (may be gzip or bzip2 compressed).", required=False)
     parser.add_argument('-v', '--verbose', help="Set verbose to true", action='store_const', const=logging.DEBUG, default=logging.WARNING, required=False)
     return parser.parse_args()
 
@@ -20,17 +20,15 @@ def main():
     print("Pyanchetto - Python Chess Engine.")
     print("*"*50)
 
-    board = Chess()
     #TODO handle metadata
-    with open(args.pgn) as pgnfile:
-        pgn = pgnfile.read()
-    tree = parse_notation(pgn)
-    #print(tree.pretty())
-    #print("*"*50)
-    interpreter = ChessInterpreter(board)
-    interpreter.execute(tree, args.verbose)
-    print(board)
-    print(board.fen())
+    for parser in parse_games(args.pgn):
+        #print(parser.tree.pretty())
+        #print("*"*50)
+        board = Chess()
+        interpreter = ChessInterpreter(board)
+        interpreter.execute(parser.tree, args.verbose)
+        print(board)
+        print(board.fen())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
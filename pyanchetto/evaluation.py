@@ -0,0 +1,165 @@
+"""
+Static evaluation: material plus piece-square tables, in centipawns.
+
+The tables are the "simplified evaluation function" tables, written from white's point of view with rank 8 on the
+first line so they read like a board diagram. piece_square[piece][sq] combines a piece's material value with its
+table entry and is negated for black pieces, so the evaluation of a position is the sum of piece_square over every
+piece on the board. The same sum split into material and positional parts can be kept up to date by the board itself
+(see track_evaluation), which turns evaluate into a couple of attribute reads.
+
+static_exchange resolves the sequence of captures on a single square with the attack lookups of Chess, so a capture
+can be judged without searching it.
+"""
+from pyanchetto.bitboard import SIZE, SQUARES, iter_squares, square_coords
+from pyanchetto.chess import pieces, pieces_index, pieces_color, inverse_color, WHITE, EMPTY
+from pyanchetto.move_encoding import PROMOTION, EN_PASSANT, promotion_types
+
+#indexed like chess.pieces (index 0, the empty square, is worth nothing)
+piece_values = (0, 20000, 900, 500, 330, 320, 100, 20000, 900, 500, 330, 320, 100)
+MATE = 100000
+#scores beyond this are mates, MATE - score is the number of plies to the mate
+MATE_BOUND = MATE - 1000
+
+_king_table = (
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20)
+_queen_table = (
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20)
+_rook_table = (
+      0,   0,   0,   0,   0,   0,   0,   0,
+      5,  10,  10,  10,  10,  10,  10,   5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+      0,   0,   0,   5,   5,   0,   0,   0)
+_bishop_table = (
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20)
+_knight_table = (
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50)
+_pawn_table = (
+      0,   0,   0,   0,   0,   0,   0,   0,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     10,  10,  20,  30,  30,  20,  10,  10,
+      5,   5,  10,  25,  25,  10,   5,   5,
+      0,   0,   0,  20,  20,   0,   0,   0,
+      5,  -5, -10,   0,   0, -10,  -5,   5,
+      5,  10,  10, -20, -20,  10,  10,   5,
+      0,   0,   0,   0,   0,   0,   0,   0)
+#pieces of one color from the least to the most valuable capturer (add 6 for black)
+_exchange_order = (6, 5, 4, 3, 2, 1)
+_tables = (None, _king_table, _queen_table, _rook_table, _bishop_table, _knight_table, _pawn_table)
+
+
+def _positional(piece):
+    if piece == 0:
+        return tuple(0 for sq in range(SQUARES))
+    if pieces_color[piece] == WHITE:
+        table = _tables[piece]
+        return tuple(table[(SIZE - 1 - sq // SIZE) * SIZE + sq % SIZE] for sq in range(SQUARES))
+    table = _tables[piece - 6] #black reads the white table upside down
+    return tuple(-table[sq] for sq in range(SQUARES))
+
+
+#signed tables for Chess.track_scores: material_scores[piece] and positional_scores[piece][sq]
+material_scores = tuple(piece_values[piece] if pieces_color[piece] == WHITE else -piece_values[piece]
+                        for piece in range(len(pieces)))
+positional_scores = tuple(_positional(piece) for piece in range(len(pieces)))
+piece_square = tuple(tuple(material_scores[piece] + positional_scores[piece][sq] for sq in range(SQUARES))
+                     for piece in range(len(pieces)))
+
+
+def track_evaluation(board):
+    """Make the board keep the material and piece-square sums used by evaluate up to date as moves are played."""
+    board.track_scores(material_scores, positional_scores)
+
+
+def evaluate(board):
+    """Returns the static score of a position in centipawns from the point of view of the player to move."""
+    tables = board.score_tables
+    if tables is not None and tables[0] is material_scores and tables[1] is positional_scores:
+        score = board.material + board.positional
+    else:
+        score = 0
+        bitboards = board.bitboards
+        for piece in range(1, len(pieces)):
+            table = piece_square[piece]
+            for sq in iter_squares(bitboards[piece]):
+                score += table[sq]
+    return score if board.current_player == WHITE else -score
+
+
+def static_exchange(board, move):
+    """
+    Static exchange evaluation of a packed move: the material (in centipawns) the moving side wins if both sides
+    keep recapturing on the destination square with their least valuable attacker and either side may stop when
+    recapturing would lose material. Sliders behind other attackers join in as the line opens. Pins are ignored.
+    """
+    from_sq, to_sq = move & 63, move >> 6 & 63
+    fromc, to = square_coords[from_sq], square_coords[to_sq]
+    piece = board.board[fromc[1]][fromc[0]]
+    occupied = board.occupancy[EMPTY] ^ (1 << from_sq)
+    flag = move >> 12 & 3
+    if flag == EN_PASSANT:
+        gains = [piece_values[6]]
+        occupied ^= 1 << (fromc[1] * SIZE + to[0])
+    else:
+        gains = [piece_values[board.board[to[1]][to[0]]]]
+    on_square = piece_values[piece]
+    if flag == PROMOTION:
+        on_square = piece_values[pieces_index[promotion_types[move >> 14]]]
+        gains[0] += on_square - piece_values[6]
+    side = inverse_color(pieces_color[piece])
+    bitboards = board.bitboards
+    while True:
+        attackers = board.attackers(to, side, occupied) & occupied
+        if not attackers:
+            break
+        offset = 0 if side == WHITE else 6
+        for capturer in _exchange_order:
+            candidates = attackers & bitboards[capturer + offset]
+            if candidates:
+                break
+        bit = candidates & -candidates
+        if capturer == 1 and board.attackers(to, inverse_color(side), occupied ^ bit) & (occupied ^ bit):
+            break #the king cannot recapture on a defended square
+        gains.append(on_square - gains[-1])
+        on_square = piece_values[capturer + offset]
+        occupied ^= bit
+        side = inverse_color(side)
+    for i in range(len(gains) - 1, 0, -1):
+        gains[i - 1] = -max(-gains[i - 1], gains[i])
+    return gains[0]
+
+
+def is_winning_capture(board, move, margin=0):
+    """True if a capture (or promotion) gains more than margin centipawns once the exchange on its square is over."""
+    return static_exchange(board, move) > margin
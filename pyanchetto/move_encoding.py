@@ -0,0 +1,49 @@
+"""
+Packed 16-bit move format.
+
+    bits 0-5    from square (rank * 8 + file, see bitboard.py)
+    bits 6-11   to square
+    bits 12-13  flag (NORMAL_MOVE, PROMOTION, EN_PASSANT or CASTLE)
+    bits 14-15  promotion piece (index into promotion_types, only meaningful with the PROMOTION flag)
+
+Packed moves fit in array('H') buffers. Turning one back into a move tuple (or into SAN) needs the board it is
+played on, see Chess.decode_move, Chess.move_from_uci and Chess.move_from_san.
+"""
+from pyanchetto.bitboard import SIZE, SQUARES
+
+NORMAL_MOVE, PROMOTION, EN_PASSANT, CASTLE = 0, 1, 2, 3
+NULL_MOVE = 0
+promotion_types = ("N", "B", "R", "Q")
+promotion_types_index = {promotion_types[i]: i for i in range(len(promotion_types))}
+square_names = tuple(chr(sq % SIZE + 97) + str(sq // SIZE + 1) for sq in range(SQUARES))
+square_names_index = {square_names[i]: i for i in range(SQUARES)}
+
+def encode(from_sq, to_sq, flag=NORMAL_MOVE, promotion=0): return from_sq | to_sq << 6 | flag << 12 | promotion << 14
+def from_square(move): return move & 63
+def to_square(move): return move >> 6 & 63
+def move_flag(move): return move >> 12 & 3
+def promotion_type(move): return promotion_types[move >> 14]
+
+
+def encode_tuple(fromc, to):
+    """
+    Pack a move in the tuple format used by the Chess move generators, i.e. a from coordinate and a
+    (file, rank, threat) destination with an optional promotion letter or en pessant pawn as fourth element.
+    """
+    flag, promotion = NORMAL_MOVE, 0
+    if len(to) == 4:
+        if isinstance(to[3], str):
+            flag, promotion = PROMOTION, promotion_types_index[to[3].upper()]
+        else:
+            flag = EN_PASSANT
+    elif not to[2] and abs(to[0] - fromc[0]) == 2: #only castling moves a piece two files without a threat
+        flag = CASTLE
+    return fromc[1] * SIZE + fromc[0] | (to[1] * SIZE + to[0]) << 6 | flag << 12 | promotion << 14
+
+
+def to_uci(move):
+    """Return the UCI long algebraic notation of a packed move (e.g. e2e4, e7e8q, e1g1 for castling)."""
+    uci = square_names[move & 63] + square_names[move >> 6 & 63]
+    if move >> 12 & 3 == PROMOTION:
+        uci += promotion_types[move >> 14].lower()
+    return uci
@@ -0,0 +1,135 @@
+"""
+Staged move ordering for alpha-beta search.
+
+MoveOrdering.pick yields the legal moves of a position in the order most likely to cause an early cutoff:
+
+    HASH_STAGE      the transposition table move, checked against the moves of its piece only
+    CAPTURE_STAGE   captures and promotions, most valuable victim first, then least valuable attacker (MVV-LVA)
+    KILLER_STAGE    quiet moves that caused a cutoff at the same ply elsewhere in the tree
+    QUIET_STAGE     the remaining quiet moves, by history score (how often and how deep they caused cutoffs)
+
+Only the hash move is produced before the full move list is generated, so a hash move cutoff skips move generation.
+The search reports every searched move and every cutoff back with searched() and cutoff(), which feeds the killer
+and history tables and the per-stage counters returned by stats().
+"""
+from pyanchetto.bitboard import square_coords
+from pyanchetto.chess import pieces_color
+from pyanchetto.move_encoding import NULL_MOVE, PROMOTION, EN_PASSANT, encode_tuple, promotion_types
+
+HASH_STAGE, CAPTURE_STAGE, KILLER_STAGE, QUIET_STAGE = range(4)
+stage_names = ("hash", "captures", "killers", "quiets")
+KILLERS_PER_PLY = 2
+MAX_PLY = 128
+HISTORY_LIMIT = 1 << 20 #history scores are halved when one of them passes this
+#ordering value of each piece type indexed like chess.pieces, the king is never a victim and the worst attacker
+_order_values = (0, 7, 5, 4, 3, 3, 1, 7, 5, 4, 3, 3, 1)
+_promotion_values = {"N": 3, "B": 3, "R": 4, "Q": 5}
+
+
+def is_capture(board, move):
+    """True if a packed move takes a piece (including en pessant)."""
+    to = square_coords[move >> 6 & 63]
+    return board.board[to[1]][to[0]] != 0 or (move >> 12 & 3) == EN_PASSANT
+
+
+def mvv_lva(board, move):
+    """Ordering score of a capture or promotion: most valuable victim first, then least valuable attacker."""
+    fromc, to = square_coords[move & 63], square_coords[move >> 6 & 63]
+    victim = 1 if (move >> 12 & 3) == EN_PASSANT else _order_values[board.board[to[1]][to[0]]]
+    score = victim * 8 - _order_values[board.board[fromc[1]][fromc[0]]]
+    if (move >> 12 & 3) == PROMOTION:
+        score += _promotion_values[promotion_types[move >> 14]] * 8
+    return score
+
+
+class MoveOrdering(object):
+
+    def __init__(self):
+        self.killers = [[NULL_MOVE] * KILLERS_PER_PLY for ply in range(MAX_PLY)]
+        #history[color - 1][from_square * 64 + to_square]
+        self.history = [[0] * 4096, [0] * 4096]
+        self.searched_moves = [0] * len(stage_names)
+        self.cutoffs = [0] * len(stage_names)
+        self.cutoff_nodes, self.first_move_cutoffs = 0, 0
+
+
+    def new_search(self):
+        """Forget the killers of the previous search and age its history scores."""
+        self.killers = [[NULL_MOVE] * KILLERS_PER_PLY for ply in range(MAX_PLY)]
+        self.__age_history()
+        self.searched_moves = [0] * len(stage_names)
+        self.cutoffs = [0] * len(stage_names)
+        self.cutoff_nodes, self.first_move_cutoffs = 0, 0
+
+
+    def pick(self, board, hash_move=NULL_MOVE, ply=0):
+        """Yields (stage, move) for every legal move of the player to move, in search order."""
+        if hash_move != NULL_MOVE:
+            fromc = square_coords[hash_move & 63]
+            if pieces_color[board.board[fromc[1]][fromc[0]]] == board.current_player and \
+                    any(encode_tuple(fromc, move) == hash_move for move in board.valid_piece_moves(fromc)):
+                yield HASH_STAGE, hash_move
+            else:
+                hash_move = NULL_MOVE
+        captures, quiets = [], []
+        for move in board.valid_moves_encoded():
+            if move == hash_move:
+                continue
+            if (move >> 12 & 3) == PROMOTION or is_capture(board, move):
+                captures.append(move)
+            else:
+                quiets.append(move)
+        captures.sort(key=lambda move: -mvv_lva(board, move))
+        for move in captures:
+            yield CAPTURE_STAGE, move
+        killers = self.killers[ply] if ply < MAX_PLY else ()
+        for killer in killers:
+            if killer != NULL_MOVE and killer in quiets:
+                quiets.remove(killer)
+                yield KILLER_STAGE, killer
+        history = self.history[board.current_player - 1]
+        quiets.sort(key=lambda move: -history[move & 4095])
+        for move in quiets:
+            yield QUIET_STAGE, move
+
+
+    def searched(self, stage):
+        self.searched_moves[stage] += 1
+
+
+    def cutoff(self, board, stage, move, ply, depth, move_number):
+        """
+        Record a beta cutoff caused by a move (the board must be at the position the move was played from). Quiet
+        moves become killers for the ply and gain depth * depth history.
+        """
+        self.cutoffs[stage] += 1
+        self.cutoff_nodes += 1
+        if move_number == 0:
+            self.first_move_cutoffs += 1
+        if stage == CAPTURE_STAGE or is_capture(board, move) or (move >> 12 & 3) == PROMOTION:
+            return
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1], killers[0] = killers[0], move
+        history = self.history[board.current_player - 1]
+        history[move & 4095] += depth * depth
+        if history[move & 4095] > HISTORY_LIMIT:
+            self.__age_history()
+
+
+    def __age_history(self):
+        self.history = [[score // 2 for score in history] for history in self.history]
+
+
+    def stats(self):
+        """Moves searched, cutoffs and cutoff rate per stage, and how often the first move searched cut off."""
+        stats = {}
+        for stage, name in enumerate(stage_names):
+            searched = self.searched_moves[stage]
+            stats[name] = {"searched": searched, "cutoffs": self.cutoffs[stage],
+                           "cutoff_rate": round(self.cutoffs[stage] / searched, 4) if searched else 0.0}
+        stats["cutoff_nodes"] = self.cutoff_nodes
+        stats["first_move_cutoff_rate"] = \
+            round(self.first_move_cutoffs / self.cutoff_nodes, 4) if self.cutoff_nodes else 0.0
+        return stats
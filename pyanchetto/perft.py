@@ -1,7 +1,12 @@
-import sys
-from multiprocessing import Process, Queue
+import argparse
+import os
+import time
+from array import array
+from multiprocessing import Pool
 
-from pyanchetto.chess import Chess, NORMAL, CHECK, CHECKMATE, STALEMATE
+from pyanchetto.bitboard import SIZE, square_coords, lsb
+from pyanchetto.chess import Chess, NORMAL, CHECK, CHECKMATE, STALEMATE, EMPTY, pieces_type_map, inverse_color
+from pyanchetto.move_encoding import encode_tuple, to_uci
 from pyanchetto.move_tree import MoveTree
 
 #correct[depth] = (nodes, captures, eps, castles, promotions, chks, discovery chks, double chks, chkmates)
@@ -12,9 +17,280 @@ correct[2] = (400, 0, 0, 0, 0, 0, 0, 0, 0)
 correct[3] = (8902, 34, 0, 0, 0, 12, 0, 0, 0)
 correct[4] = (197281, 1576, 0, 0, 0, 469, 0, 0, 8)
 correct[5] = (4865609, 82719, 258, 0, 0, 27351, 6, 0, 347)
+#well-known perft positions as (name, fen, leaf node counts for depths 1, 2, ...)
+suite = (
+    ("initial", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", (20, 400, 8902, 197281, 4865609)),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", (48, 2039, 97862, 4085603)),
+    ("position 3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", (14, 191, 2812, 43238, 674624)),
+    ("position 4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", (6, 264, 9467, 422333)),
+    ("position 4 mirrored", "r2q1rk1/pP1p2pp/Q4n2/bbp1p3/Np6/1B3NBn/pPPP1PPP/R3K2R b KQ - 0 1", (6, 264, 9467, 422333)),
+    ("position 5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", (44, 1486, 62379, 2103487)),
+    ("position 6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", (46, 2079, 89890, 3894594)),
+)
+REPLACE_ALWAYS, REPLACE_DEPTH = 0, 1
+replacement_policies = {"always": REPLACE_ALWAYS, "depth": REPLACE_DEPTH}
 
 
-def perft(root, branch, board, depth, max_depth, child_processes=False, queue=None):
+class TranspositionTable(object):
+    """
+    A fixed-size hash table of perft subtree node counts keyed by Zobrist key and remaining depth. Entries live in
+    flat arrays so memory use is bounded by the configured size no matter how many positions are visited.
+
+    The replacement policy decides what happens when two positions map to the same slot: REPLACE_ALWAYS keeps the
+    most recent entry, REPLACE_DEPTH keeps whichever entry covers the deeper (more expensive) subtree.
+    """
+    ENTRY_BYTES = 17 #8 byte key, 8 byte count, 1 byte depth
+
+    def __init__(self, size_mb=16, replacement=REPLACE_DEPTH):
+        self.size = max(1, int(size_mb * 1024 * 1024) // self.ENTRY_BYTES)
+        self.replacement = replacement
+        self.keys = array("Q", bytes(8 * self.size))
+        self.counts = array("Q", bytes(8 * self.size))
+        self.depths = array("B", bytes(self.size)) #0 marks an empty slot since depth 0 is never stored
+        self.hits, self.misses, self.stores, self.overwrites = 0, 0, 0, 0
+
+    def probe(self, key, depth):
+        """Returns the stored node count for a position and remaining depth, or None."""
+        index = key % self.size
+        if self.depths[index] == depth and self.keys[index] == key:
+            self.hits += 1
+            return self.counts[index]
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, count):
+        index = key % self.size
+        stored_depth = self.depths[index]
+        if stored_depth and self.replacement == REPLACE_DEPTH and stored_depth > depth:
+            return
+        if stored_depth:
+            self.overwrites += 1
+        self.keys[index], self.depths[index], self.counts[index] = key, depth, count
+        self.stores += 1
+
+    def stats(self):
+        probes = self.hits + self.misses
+        hit_rate = self.hits / probes if probes else 0.0
+        return {"entries": self.size, "probes": probes, "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(hit_rate, 4), "stores": self.stores, "overwrites": self.overwrites}
+
+
+def legal_moves(board):
+    """Returns the legal moves of the current player as a list of (piece, move) pairs."""
+    piece_moves = board.valid_moves()
+    return [(piece, move) for piece in piece_moves for move in piece_moves[piece]]
+
+
+def perft_nodes(board, depth):
+    """Counts the leaf nodes depth plies below the board's position (moves at the last ply are counted, not played)."""
+    if depth == 0:
+        return 1
+    moves = legal_moves(board)
+    if depth == 1:
+        return len(moves)
+    count = 0
+    for piece, move in moves:
+        board.make_move(piece, move)
+        count += perft_nodes(board, depth - 1)
+        board.unmake_move()
+    return count
+
+
+def perft_divide(board, depth):
+    """Returns (uci move, leaf nodes) for every legal move at the root, the usual way to bisect a perft mismatch."""
+    divide = []
+    for piece, move in legal_moves(board):
+        board.make_move(piece, move)
+        divide.append((to_uci(encode_tuple(piece, move)), perft_nodes(board, depth - 1)))
+        board.unmake_move()
+    return divide
+
+
+def run_suite(max_depth, positions=suite):
+    """
+    Runs perft on every suite position up to max_depth (or the deepest known count) and yields
+    (name, depth, nodes, expected nodes, seconds) as each result becomes available.
+    """
+    for name, fen, expected in positions:
+        board = Chess.from_fen(fen)
+        for depth in range(1, min(max_depth, len(expected)) + 1):
+            start = time.perf_counter()
+            nodes = perft_nodes(board, depth)
+            yield name, depth, nodes, expected[depth - 1], time.perf_counter() - start
+
+
+def nodes_per_second(nodes, seconds): return int(nodes / seconds) if seconds > 0 else 0
+
+
+def perft_hashed(board, depth, table):
+    """Counts the leaf nodes depth plies below the board's position, reusing subtree counts from the table."""
+    if depth == 0:
+        return 1
+    key = board.zobrist_key
+    count = table.probe(key, depth)
+    if count is not None:
+        return count
+    moves = legal_moves(board)
+    if depth == 1:
+        count = len(moves)
+    else:
+        count = 0
+        for piece, move in moves:
+            board.make_move(piece, move)
+            count += perft_hashed(board, depth - 1, table)
+            board.unmake_move()
+    table.store(key, depth, count)
+    return count
+
+
+def perft_count(board, max_depth):
+    """
+    Walks every line of play up to max_depth plies on a single board and accumulates the statistics of the correct
+    table without building a MoveTree, so memory use is constant apart from the recursion stack.
+
+    Returns
+    _______
+    A list indexed by depth of [nodes, captures, eps, castles, promotions, chks, discovery chks, double chks,
+    chkmates] counts, in the same layout as validate.
+    """
+    counts = [[0] * 9 for depth in range(max_depth + 1)]
+    counts[0][0] = 1
+    checkers = _checkers(board)
+    num_moves = _count_children(board, 1, max_depth, counts) if max_depth > 0 else None
+    if checkers:
+        counts[0][5] += 1
+        if board.move_list: #the root was reached by a move, which may have uncovered the check
+            to = board.move_list[-1][1]
+            counts[0][6] += _discovered(checkers, to[1] * SIZE + to[0])
+        counts[0][7] += 1 if checkers & (checkers - 1) else 0
+        if num_moves == 0 or (num_moves is None and not _has_legal_move(board)):
+            counts[0][8] += 1
+    return counts
+
+
+def _checkers(board):
+    """Bitboard of the pieces giving check to the player to move."""
+    player = board.current_player
+    king = board.bitboards[pieces_type_map["K"][player - 1]]
+    return board.attackers(square_coords[lsb(king)], inverse_color(player)) if king else 0
+
+
+def _discovered(checkers, to_sq):
+    """1 for a discovered check: a single checker that is not the piece that just moved to to_sq (else 0)."""
+    return 1 if not checkers & (checkers - 1) and checkers != 1 << to_sq else 0
+
+
+def _has_legal_move(board):
+    piece_moves = board.valid_moves()
+    for piece in piece_moves:
+        if next(piece_moves[piece], None) is not None:
+            return True
+    return False
+
+
+def _count_children(board, depth, max_depth, counts):
+    """Adds the statistics of every child of the board's position to counts[depth] and returns the number of children."""
+    moves = legal_moves(board)
+    stats = counts[depth]
+    for piece, move in moves:
+        to_sq = move[1] * SIZE + move[0]
+        stats[0] += 1
+        if len(move) == 4:
+            if isinstance(move[3], str):
+                stats[4] += 1
+            else:
+                stats[1] += 1
+                stats[2] += 1
+        elif not move[2] and abs(move[0] - piece[0]) == 2 and board.is_type(piece, "K"):
+            stats[3] += 1
+        if board.board[move[1]][move[0]] != EMPTY:
+            stats[1] += 1
+        board.make_move(piece, move)
+        checkers = _checkers(board)
+        num_moves = _count_children(board, depth + 1, max_depth, counts) if depth < max_depth else None
+        if checkers:
+            stats[5] += 1
+            stats[6] += _discovered(checkers, to_sq)
+            if checkers & (checkers - 1):
+                stats[7] += 1
+            if num_moves == 0 or (num_moves is None and not _has_legal_move(board)):
+                stats[8] += 1
+        board.unmake_move()
+    return len(moves)
+
+
+def perft_parallel(board, max_depth, workers=None, split_depth=2, chunk_size=8):
+    """
+    Computes the same statistics as perft_count with a bounded pool of worker processes. The tree is split at
+    split_depth: the counts down to that depth are computed locally, and every line of play split_depth plies long
+    becomes a task. Tasks are sent as short lists of packed moves and workers only send back count vectors.
+
+    Parameters
+    ----------
+    board: Chess
+        The root position.
+    max_depth: int
+        The number of plies to search.
+    workers: int (optional)
+        The number of worker processes (defaults to the number of CPUs).
+    split_depth: int (optional, default 2)
+        The depth at which work is divided. Deeper splits create more, smaller tasks, which keeps every core busy
+        when root moves have very different subtree sizes.
+    chunk_size: int (optional, default 8)
+        The number of tasks handed to a worker at a time.
+    """
+    split_depth = min(split_depth, max_depth)
+    counts = perft_count(board, split_depth)
+    counts.extend([0] * 9 for depth in range(split_depth + 1, max_depth + 1))
+    if split_depth == max_depth:
+        return counts
+    lines = []
+    _split_lines(board, split_depth, [], lines)
+    with Pool(workers or os.cpu_count(), initializer=_init_worker, initargs=(board, split_depth, max_depth)) as pool:
+        for line_counts in pool.imap_unordered(_count_line, lines, chunk_size):
+            for depth, stats in enumerate(line_counts, split_depth + 1):
+                for i in range(len(stats)):
+                    counts[depth][i] += stats[i]
+    return counts
+
+
+def _split_lines(board, depth, line, lines):
+    if depth == 0:
+        lines.append(array("H", line))
+        return
+    for piece, move in legal_moves(board):
+        board.make_move(piece, move)
+        line.append(encode_tuple(piece, move))
+        _split_lines(board, depth - 1, line, lines)
+        line.pop()
+        board.unmake_move()
+
+
+_worker_state = None
+
+
+def _init_worker(board, split_depth, max_depth):
+    global _worker_state
+    _worker_state = (board, split_depth, max_depth)
+
+
+def _count_line(line):
+    """Worker task: the statistics for depths split_depth + 1 .. max_depth below one line of play."""
+    board, split_depth, max_depth = _worker_state
+    for move in line:
+        board.make_move(move)
+    counts = [[0] * 9 for depth in range(max_depth + 1)]
+    _count_children(board, split_depth + 1, max_depth, counts)
+    for move in line:
+        board.unmake_move()
+    return counts[split_depth + 1:]
+
+
+def perft(root, branch, board, depth, max_depth, encoded=False):
+    """
+    Builds the full MoveTree below the board's position (for validate and --tree). Counting statistics without the
+    tree is done by perft_count, and in parallel by perft_parallel.
+    """
     branch.game_state = board.game_state()
     if len(board.move_list)-1 in board.captured_pieces:
         branch.capture = True
@@ -24,32 +300,14 @@ def perft(root, branch, board, depth, max_depth, child_processes=False, queue=No
         for piece in piece_moves:
             for move in piece_moves[piece]:
                 moves.append((piece, move))
-        children = branch.children
-        processes = []
-        queues = []
         for move in moves:
-            clone = Chess(board)
             #TODO pgn_gen can be turned on for benchmarking mode
-            clone.move(move[0], move[1], pgn_gen=False)
-            child = MoveTree(move)
-            if child_processes:
-                q = Queue()
-                p = Process(target=perft, args=(root, child, clone, depth + 1, max_depth, False, q))
-                p.start()
-                processes.append(p)
-                queues.append(q)
-            else:
-                branch.children.append(child)
-                perft(root, child, clone, depth + 1, max_depth, False)
-        for i, p in enumerate(processes):
-            filled_branch = queues[i].get()
-            #for child in filled_branch.children:
-            branch.children.append(filled_branch)
-            p.join()
-        if queue is not None:
-            queue.put(branch)
-        else:
-            return branch
+            board.make_move(move[0], move[1])
+            child = MoveTree(encode_tuple(move[0], move[1]) if encoded else move)
+            branch.children.append(child)
+            perft(root, child, board, depth + 1, max_depth, encoded)
+            board.unmake_move()
+    return branch
 
 
 def validate(root, max_depth):
@@ -74,20 +332,64 @@ def validate(root, max_depth):
     return valid
 
 
+def parse_args():
+    """Parse arguments from the command line."""
+    parser = argparse.ArgumentParser(description="Pyanchetto perft move generation validator.")
+    parser.add_argument('depth', type=int, help="The number of plies to search.")
+    parser.add_argument('--fen', default=None, help="Start from this position instead of the initial position.", required=False)
+    parser.add_argument('--divide', action='store_true', help="Print the leaf node count below every root move.", required=False)
+    parser.add_argument('--suite', action='store_true', help="Run the standard perft positions up to depth and check their node counts.", required=False)
+    parser.add_argument('--tree', action='store_true', help="Build the full MoveTree instead of streaming counts.", required=False)
+    parser.add_argument('-w', '--workers', type=int, default=None, help="Number of worker processes (defaults to the CPU count, 1 disables the pool).", required=False)
+    parser.add_argument('--split-depth', type=int, default=2, help="Depth at which work is divided between workers.", required=False)
+    parser.add_argument('--hash', type=float, default=None, help="Count nodes with a transposition table of this many megabytes.", required=False)
+    parser.add_argument('--replace', choices=sorted(replacement_policies), default="depth", help="Transposition table replacement policy.", required=False)
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
     print("*"*50)
     print("Pyanchetto Perft Validator.")
     print("*"*50)
-    depth = int(sys.argv[1])
-    threads = 1
-
-    board = Chess()
-    root = MoveTree("Root")
-    perft(root, root, board, 0, depth, True)
-    valid = validate(root, depth)
-    print(valid)
-    #print(root.prettyPrint())
-    print(root.count_nodes())
+    depth = args.depth
+
+    if args.suite:
+        failures = 0
+        for name, d, nodes, expected, seconds in run_suite(depth):
+            failures += nodes != expected
+            print(name, d, nodes, nodes == expected, nodes_per_second(nodes, seconds), "nps")
+        print("all counts correct" if failures == 0 else str(failures) + " incorrect counts")
+        return
+    board = Chess() if args.fen is None else Chess.from_fen(args.fen)
+    start = time.perf_counter()
+    if args.divide:
+        divide = perft_divide(board, depth)
+        for move, nodes in divide:
+            print(move, nodes)
+        nodes = sum(nodes for move, nodes in divide)
+        print("moves", len(divide), "nodes", nodes, nodes_per_second(nodes, time.perf_counter() - start), "nps")
+        return
+    if args.hash is not None:
+        table = TranspositionTable(args.hash, replacement_policies[args.replace])
+        nodes = perft_hashed(board, depth, table)
+        print(nodes, nodes_per_second(nodes, time.perf_counter() - start), "nps")
+        print(table.stats())
+        return
+    if args.tree:
+        root = MoveTree("Root")
+        perft(root, root, board, 0, depth)
+        valid = validate(root, depth)
+        print(valid)
+        #print(root.prettyPrint())
+        print(root.count_nodes())
+        return
+    workers = args.workers or os.cpu_count()
+    counts = perft_count(board, depth) if workers == 1 else perft_parallel(board, depth, workers, args.split_depth)
+    is_initial = args.fen is None
+    for d in range(depth + 1):
+        print(d, counts[d], "" if d not in correct or not is_initial else tuple(counts[d]) == correct[d])
+    print(nodes_per_second(counts[depth][0], time.perf_counter() - start), "nps")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
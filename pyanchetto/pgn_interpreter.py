@@ -21,8 +21,12 @@ class ChessInterpreter():
             self.board = Chess()
         self.turn_number = 0
         self.verbose = False
-        self.fens = []
-        self.captured = []
+        #(from, to) of every half-move played, fens and captured are replayed from it when first read
+        self.moves = []
+        self.__start = None
+        self.__replay = None
+        self.__fens = []
+        self.__captured = []
         self.termination_marker = None
         self.metadata_map = {}
 
@@ -36,8 +40,8 @@ class ChessInterpreter():
 
         verbose: log debug information and intermediate board positions if true
         """
-        self.fens.append(self.board.fen())
-        self.captured.append(self.board.get_captured_pieces())
+        if self.__start is None:
+            self.__start = Chess(self.board)
         self.verbose = verbose
         if verbose:
             logging.basicConfig(level=logging.DEBUG)
@@ -47,12 +51,43 @@ class ChessInterpreter():
             logging.getLogger().setLevel(logging.WARN)
         self.__pgn(tree.children[0])
 
+    @property
+    def fens(self):
+        """The FEN of the position before the game and after every half-move played so far."""
+        return self.__history()[0]
+
+    @property
+    def captured(self):
+        """The types of the pieces captured before the game and after every half-move played so far."""
+        return self.__history()[1]
+
+    def __history(self):
+        """
+        Replay the half-moves not yet seen on a copy of the starting position, so that games whose history is never
+        read do not pay for a FEN and a list of captured pieces on every move.
+        """
+        if self.__start is None:
+            return self.__fens, self.__captured
+        board = self.__replay
+        if board is None:
+            board = self.__replay = Chess(self.__start)
+            self.__fens.append(board.fen())
+            self.__captured.append(board.get_captured_pieces())
+        for from_coord, to_coord in self.moves[len(self.__fens) - 1:]:
+            board.make_move(from_coord, to_coord)
+            captured = board.captured_pieces.get(len(board.move_list) - 1)
+            self.__fens.append(board.fen())
+            self.__captured.append(self.__captured[-1] + [captured[0]] if captured else list(self.__captured[-1]))
+        return self.__fens, self.__captured
+
     def __pgn(self, tree):
         for child in tree.children:
             if child.data == "turn":
                 self.__move(child)
             elif child.data == "metadata":
                 self.__metadata(child)
+            elif child.data == "outcome": #the yarp parser wraps the marker in an outcome node
+                self.termination_marker = child.children[0].data
             elif child.data == "white_win" or child.data == "black_win" or child.data == "draw":
                 self.termination_marker = child.data
 
@@ -72,14 +107,11 @@ class ChessInterpreter():
                 if on_move == 2:
                     raise PGNInterpreterError("More than two pieces moved in one turn.")
                 self.__player_turn(child)
-                self.fens.append(self.board.fen())
-                self.captured.append(self.board.get_captured_pieces())
                 on_move += 1
 
     def __player_turn(self, tree):
         required_file = -1
         required_rank = -1
-        threaten = True
         self.promotion_type = None
         if tree.children[0].data in ("king_side_castle", "queen_side_castle"):
             piece, self.to_coord = self.__castle(tree.children[0])
@@ -109,49 +141,24 @@ class ChessInterpreter():
                 self.to_coord = self.__coord(tree.children[1])
         else:
             raise PGNInterpreterError("Error while running PGN near: '" + str(tree) + "'")
-        from_coord, threaten, special = self.__find_piece_for_move(required_file, required_rank, threaten)
-        if self.promotion_type is not None:
-            self.to_coord = (self.to_coord[0], self.to_coord[1], threaten, self.promotion_type)
-        else:
-            if special is not None:
-                self.to_coord = (self.to_coord[0], self.to_coord[1], threaten, special)
-            else:
-                self.to_coord = (self.to_coord[0], self.to_coord[1], threaten)
+        logging.debug(f"Looking for a {self.piece} that can move to {self.to_coord} / {coord_to_notation(self.to_coord)}")
+        resolved = self.board.resolve_san(self.piece, self.to_coord, None if required_file == -1 else required_file,
+                                          None if required_rank == -1 else required_rank, self.promotion_type)
+        if resolved is None:
+            raise BadMoveException("No legal move for " + self.piece + " to " + coord_to_notation(self.to_coord))
+        from_coord, self.to_coord = resolved
         try:
             logging.debug("Player " + str(self.board.current_player) + " moving " + self.piece + " to " + str(self.to_coord))
             logging.debug(f"Move: {from_coord}, {self.to_coord}")
-            self.board.move(from_coord, self.to_coord)
-            logging.info("\n" + str(self.board))
+            self.board.apply_move(from_coord, self.to_coord)
+            self.moves.append((from_coord, self.to_coord))
+            if self.verbose: #drawing the board is not free, skip it when the log is off
+                logging.info("\n" + str(self.board))
         except Exception as e:
             logging.exception("Failed to apply move.")
             traceback.print_exc()
             raise e
 
-    def __find_piece_for_move(self, required_file, required_rank, threaten):
-        """
-        Find the piece referred to by the PGN notation for a turn when the notation is ambiguous (e.g. only a
-        file or rank are provided, or just a piece type and destination.
-        """
-        of_type = self.board.player_pieces_of_type(self.piece, self.board.current_player)
-        logging.debug(f"Looking for a {self.piece} that can move to {self.to_coord} / {coord_to_notation(self.to_coord)}")
-        of_type = list(of_type) #FIXME figure out why this works and generator doesn't
-        for piece in of_type:
-            if required_file != -1:
-                if piece[0] != required_file:
-                    continue
-            if required_rank != -1:
-                if piece[1] != required_rank:
-                    continue
-            for move in self.board.valid_piece_moves(piece):
-                if move[0] == self.to_coord[0] and move[1] == self.to_coord[1]:
-                    from_coord = piece
-                    threaten = move[2]
-                    special = None
-                    if len(move) == 4:
-                        special = move[3]
-                    return from_coord, threaten, special
-        return None, None, None
-
     def __coord(self, tree):
         file = self.__rank(tree.children[0])
         rank = self.__file(tree.children[1])
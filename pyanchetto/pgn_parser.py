@@ -1,5 +1,8 @@
 from yarp_parser.recursive_parser import *
 
+from pyanchetto.pgn_reader import open_pgn, read_games
+from pyanchetto.pgn_tokenizer import TokenParser
+
 NUMBER_REGEX = "^[0-9]+$"
 RANKS = {'1', '2', '3', '4', '5', '6', '7', '8'}
 FILES = {'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h'}
@@ -33,12 +36,26 @@ normal_mode_lexemes.update(PIECES)
 
 
 def parse_file(file_name):
-    with open(file_name, "r") as file:
+    with open_pgn(file_name) as file:
         data = file.read()
         return parse_notation(data)
 
 
+def parse_games(file_name):
+    """Parse a multi-game (and possibly compressed) PGN file one game at a time, see pgn_reader.py."""
+    for game in read_games(file_name):
+        yield parse_notation(game)
+
+
 def parse_notation(string):
+    """Parse a PGN string with the single pass tokenizer (see pgn_tokenizer.py). The result's tree is the same one PGNParser builds."""
+    parser = TokenParser(string)
+    parser.parse()
+    return parser
+
+
+def parse_notation_recursive(string):
+    """Parse a PGN string with the recursive PGNParser."""
     parser = PGNParser(string)
     parser.parse()
     return parser
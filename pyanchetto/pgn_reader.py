@@ -0,0 +1,64 @@
+"""
+Streaming reader for multi-game PGN databases.
+
+Games are read one line at a time and handed out one game at a time, so memory use is bounded by the longest game
+rather than the size of the file. A game ends where the tag pairs of the next game begin: a line starting with "["
+after the movetext of the current game, outside of any {comment}. Brace comments do not nest (a comment ends at the
+first "}") and a "{" in a ";" comment running to the end of the line does not open one. Lines starting with "%" are
+PGN escape lines and are skipped. Files compressed with gzip or bzip2 are detected from their first bytes and
+decompressed on the fly.
+"""
+import bz2
+import gzip
+
+GZIP_MAGIC = b"\x1f\x8b"
+BZIP2_MAGIC = b"BZh"
+
+
+def open_pgn(file_name, encoding="utf-8"):
+    """Open a plain, gzip or bzip2 PGN file as text. Undecodable bytes are replaced rather than raising."""
+    with open(file_name, "rb") as file:
+        magic = file.read(3)
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(file_name, "rt", encoding=encoding, errors="replace")
+    if magic.startswith(BZIP2_MAGIC):
+        return bz2.open(file_name, "rt", encoding=encoding, errors="replace")
+    return open(file_name, "r", encoding=encoding, errors="replace")
+
+
+def split_games(lines):
+    """Yields the text of every game in an iterable of PGN lines."""
+    game = []
+    in_movetext, in_comment = False, False
+    for line in lines:
+        stripped = line.lstrip()
+        if stripped.startswith("%"):
+            continue
+        if stripped.startswith("[") and in_movetext and not in_comment:
+            yield "".join(game).strip()
+            game, in_movetext = [], False
+        if stripped and (in_movetext or not stripped.startswith("[")):
+            in_movetext = True
+            in_comment = ends_in_comment(stripped, in_comment)
+        game.append(line)
+    text = "".join(game).strip()
+    if text:
+        yield text
+
+
+def ends_in_comment(line, in_comment=False):
+    """Determines if a brace comment is still open at the end of a line of movetext."""
+    for char in line:
+        if in_comment:
+            in_comment = char != "}"
+        elif char == "{":
+            in_comment = True
+        elif char == ";":
+            break
+    return in_comment
+
+
+def read_games(file_name, encoding="utf-8"):
+    """Yields the text of every game in a (possibly compressed) PGN file, reading it incrementally."""
+    with open_pgn(file_name, encoding) as file:
+        yield from split_games(file)
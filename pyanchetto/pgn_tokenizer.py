@@ -0,0 +1,205 @@
+"""
+Single pass PGN tokenizer.
+
+tokenize splits a PGN string into tag pairs, comments, move numbers, NAGs, SAN moves, results and whitespace with one
+compiled regular expression, matching each token once and in order. TokenParser assembles the tokens into the same
+abstract syntax tree PGNParser builds character by character with the recursive parser (see pgn_parser.py), so
+ChessInterpreter runs on either:
+
+    root: [pgn: [metadata: [Event,"Paris"],turn: [move_number: [1],move: [coord: [file: [e],rank: [4]]],...]]]
+
+Input the recursive parser accepts gives an identical tree. A few valid inputs it rejects by accident are accepted: a
+check, mate or move quality at the very end of the text, and whitespace between a NAG and the comment after it.
+"""
+import re
+
+from yarp_parser.recursive_parser import Parser, Tree, SyntaxError
+from yarp_parser.streaming_lexer import Token
+
+#token kinds, the names of the groups of token_regex
+WHITESPACE, TAG, COMMENT, RESULT, NUMBER, NAG, MOVE = "whitespace", "tag", "comment", "result", "number", "nag", "move"
+#characters the recursive parser's lexer splits on, digits and other characters form longer tokens between them
+_lexemes = r'\[\]"{}.=+#x?!$\-/a-hKQRBNP'
+_end = r'(?=[' + _lexemes + r' \t\r\n]|\Z)' #the end of a digit or castling token
+token_regex = re.compile(r"""
+    (?P<whitespace>[ \t\r\n]+)
+  | (?P<tag>\[(?P<key>[^\s\[\]]+|[\s\S])[ \t\r\n]*(?P<value>[^\]]*)\])
+  | (?P<comment>\{(?P<text>[^}]*)\})
+  | (?P<result>(?:1-0|0-1|1/2-1/2)""" + _end + r""")
+  | (?P<number>(?P<digits>[0-9]+)""" + _end + r"""(?P<dots>\.*))
+  | (?P<nag>\$(?P<glyph>(?:[0-9]+""" + _end + r""")?))
+  | (?P<move>(?:
+        (?P<castle>O-O-O|O-O)""" + _end + r"""
+      | (?P<piece>[KQRBNP])(?:(?P<disambiguation>[a-h1-8])(?=x?[a-h][1-8]))?(?P<piece_capture>x)?
+        (?P<piece_file>[a-h])(?P<piece_rank>[1-8])""" + _end + r"""
+      | (?P<pawn_file>[a-h])(?:(?P<pawn_capture>x)(?P<target_file>[a-h]))?(?P<pawn_rank>[1-8])""" + _end + r"""
+        (?:=(?P<promotion>[KQRBNP]))?
+    )(?P<check>[+#])?(?P<quality>[!?]*))
+""", re.VERBOSE)
+_normal_tokens = re.compile(r'[ \t\r\n]+|[' + _lexemes + r' ]|[^\s' + _lexemes + r']+')
+_tag_tokens = re.compile(r'\s|\[|[^\s\[\]]+')
+_comment_tokens = re.compile(r'\s|\{|[^\s{}]+')
+_outcomes = {"1-0": "white_win", "0-1": "black_win", "1/2-1/2": "draw"}
+
+
+def tokenize(string):
+    """Yields (kind, match) for every token of a PGN string. Raises SyntaxError at text that is not a PGN token."""
+    pos, end = 0, len(string)
+    match = token_regex.match
+    while pos < end:
+        m = match(string, pos)
+        if m is None:
+            raise SyntaxError(f"Unexpected PGN token. Error near: '{string[pos:pos + 20]}'")
+        yield m.lastgroup, m
+        pos = m.end()
+
+
+class TokenParser(object):
+    """Builds the PGNParser syntax tree of a PGN string from its tokens. Call parse(), then read tree."""
+
+    pretty_print = Parser.pretty_print
+
+    def __init__(self, string):
+        self.string = string
+        self.tree = None
+        self.__tokens = None
+
+
+    def parse(self):
+        tokens = list(tokenize(self.string))
+        self.__tokens = tokens
+        self.tree = Tree("root")
+        pgn = self.__node(self.tree, "pgn")
+        i = self.__whitespace(tokens, 0)
+        while i < len(tokens):
+            kind, m = tokens[i]
+            if kind == TAG:
+                metadata = self.__node(pgn, "metadata")
+                self.__node(metadata, m.group("key"))
+                self.__node(metadata, m.group("value"))
+                i += 1
+            elif kind == NUMBER and m.group("dots"):
+                i = self.__turn(pgn, tokens, i)
+            elif kind == RESULT:
+                self.__node(self.__node(pgn, "outcome"), _outcomes[m.group()])
+                i += 1
+            else:
+                self.__error("winning annotation", m)
+            i = self.__whitespace(tokens, i)
+        return True
+
+
+    @property
+    def tokens(self):
+        """The tokens the recursive parser's lexer would have produced, split on demand (for debugging and tests)."""
+        tokens = []
+        for kind, m in self.__tokens or ():
+            if kind == WHITESPACE:
+                tokens.append(m.group())
+            elif kind == TAG:
+                tokens.extend((Token("["), Token(m.group("key"))))
+                if m.end("key") < m.start("value"):
+                    tokens.append(self.string[m.end("key"):m.start("value")])
+                tokens.extend(self.__split(_tag_tokens, m.group("value")))
+                tokens.append(Token("]"))
+            elif kind == COMMENT:
+                tokens.append(Token("{"))
+                tokens.extend(self.__split(_comment_tokens, m.group("text")))
+                tokens.append(Token("}"))
+            else:
+                tokens.extend(self.__split(_normal_tokens, m.group()))
+        return tokens
+
+
+    def __split(self, regex, string):
+        return [token if token.isspace() else Token(token) for token in regex.findall(string)]
+
+
+    def __turn(self, pgn, tokens, i):
+        turn = self.__node(pgn, "turn")
+        self.__node(self.__node(turn, "move_number"), tokens[i][1].group("digits"))
+        i = self.__whitespace(tokens, i + 1)
+        if i == len(tokens) or tokens[i][0] != MOVE:
+            self.__error("move description", tokens[i][1] if i < len(tokens) else None)
+        self.__move(turn, tokens[i][1])
+        spaced = False
+        for expected in (NAG, COMMENT, NUMBER):
+            start, i = i + 1, self.__whitespace(tokens, i + 1)
+            spaced = spaced or i > start
+            if i < len(tokens) and tokens[i][0] == expected and (expected != NUMBER or tokens[i][1].group("dots")):
+                self.__annotation(turn, tokens[i])
+            else:
+                i -= 1
+        start, i = i + 1, self.__whitespace(tokens, i + 1)
+        spaced = spaced or i > start
+        if i < len(tokens) and tokens[i][0] == MOVE:
+            if not spaced:
+                self.__error("space between half moves", tokens[i][1])
+            self.__move(turn, tokens[i][1])
+            i = self.__whitespace(tokens, i + 1)
+        for expected in (NAG, COMMENT):
+            if i < len(tokens) and tokens[i][0] == expected:
+                self.__annotation(turn, tokens[i])
+                i = self.__whitespace(tokens, i + 1)
+        return i
+
+
+    def __annotation(self, turn, token):
+        kind, m = token
+        if kind == NAG:
+            self.__node(self.__node(turn, "anno_glyph"), m.group("glyph"))
+        elif kind == COMMENT:
+            self.__node(self.__node(turn, "comment"), m.group("text"))
+        else:
+            self.__node(self.__node(turn, "move_number"), m.group("digits"))
+
+
+    def __move(self, turn, m):
+        move = self.__node(turn, "move")
+        if m.group("castle"):
+            self.__node(move, "queen_side_castle" if m.group("castle") == "O-O-O" else "king_side_castle")
+        elif m.group("piece"):
+            self.__node(self.__node(move, "piece_type"), m.group("piece"))
+            disambiguation = m.group("disambiguation")
+            if disambiguation:
+                kind = "rank" if disambiguation.isdigit() else "file"
+                self.__node(self.__node(self.__node(move, "disambiguation"), kind), disambiguation)
+            if m.group("piece_capture"):
+                self.__node(move, "capture")
+            self.__coord(move, m.group("piece_file"), m.group("piece_rank"))
+        else:
+            if m.group("pawn_capture"):
+                self.__node(self.__node(move, "file"), m.group("pawn_file"))
+                self.__node(move, "capture")
+                self.__coord(move, m.group("target_file"), m.group("pawn_rank"))
+            else:
+                self.__coord(move, m.group("pawn_file"), m.group("pawn_rank"))
+            if m.group("promotion"):
+                promotion = self.__node(move, "promotion")
+                self.__node(promotion, "=")
+                self.__node(self.__node(promotion, "piece_type"), m.group("promotion"))
+        if m.group("check") or m.group("quality"):
+            modifiers = self.__node(move, "move_modifiers")
+            for modifier in (m.group("check") or "") + m.group("quality"):
+                self.__node(modifiers, modifier)
+
+
+    def __coord(self, move, file, rank):
+        coord = self.__node(move, "coord")
+        self.__node(self.__node(coord, "file"), file)
+        self.__node(self.__node(coord, "rank"), rank)
+
+
+    def __node(self, parent, data):
+        node = Tree(data)
+        parent.children.append(node)
+        return node
+
+
+    def __whitespace(self, tokens, i):
+        return i + 1 if i < len(tokens) and tokens[i][0] == WHITESPACE else i
+
+
+    def __error(self, description, m):
+        near = self.string[m.start():m.start() + 20] if m is not None else ""
+        raise SyntaxError(f"Expected {description}. Error near: '{near}'")
@@ -0,0 +1,154 @@
+"""
+Bulk validation of PGN databases across processes.
+
+Every game of a multi-game PGN file, or of every PGN file in a directory, is parsed and replayed by ChessInterpreter
+in a pool of worker processes:
+
+    python -m pyanchetto.pgn_validator games/ -w 8 -o report.tsv
+
+Games are read incrementally (see pgn_reader.py) and handed to the pool in batches of chunks, the next batch being
+validated while the previous one is reported, so memory stays bounded for databases of any size. Results come back
+in input order as one report with a row per game: the file, the game's index within it, the final FEN, the
+termination marker, the error (if the game could not be parsed or replayed) and the number of plies played.
+"""
+import argparse
+import os
+import sys
+import time
+from itertools import islice
+from multiprocessing import Pool
+
+from pyanchetto.chess import Chess
+from pyanchetto.pgn_interpreter import ChessInterpreter
+from pyanchetto.pgn_parser import parse_notation
+from pyanchetto.pgn_reader import read_games
+
+PGN_EXTENSIONS = (".pgn", ".pgn.gz", ".pgn.bz2")
+BATCH_CHUNKS = 4 #chunks per worker in a batch
+report_columns = ("file", "game", "fen", "termination", "error", "plies")
+
+
+def pgn_files(path):
+    """The PGN files (plain or compressed) of a directory in name order, or the path itself if it is a file."""
+    if not os.path.isdir(path):
+        return [path]
+    return [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.lower().endswith(PGN_EXTENSIONS)]
+
+
+def iter_games(path):
+    """Yields (file name, game index, game text) for every game of a PGN file or directory."""
+    for file_name in pgn_files(path):
+        for index, game in enumerate(read_games(file_name)):
+            yield file_name, index, game
+
+
+def validate_game(game):
+    """
+    Parse and replay the text of one game. Returns (final fen, termination marker, error, plies), where error is None
+    for a valid game. The fen and plies of an invalid game are those of the last position it reached.
+    """
+    board = Chess()
+    interpreter = ChessInterpreter(board)
+    error = None
+    try:
+        interpreter.execute(parse_notation(game).tree, False)
+    except Exception as e:
+        error = type(e).__name__ + ": " + " ".join(str(e).split())
+    return board.fen(), interpreter.termination_marker, error, len(board.move_list)
+
+
+def validate_games(games, workers=None, chunk_size=16, progress=None):
+    """
+    Validate games with a pool of worker processes.
+
+    Parameters
+    ----------
+    games: iterable
+        (file name, game index, game text) triples, e.g. from iter_games.
+    workers: int (optional)
+        The number of worker processes (defaults to the number of CPUs, 1 validates in this process).
+    chunk_size: int (optional, default 16)
+        The number of games handed to a worker at a time. Games are short tasks, so chunks keep the inter-process
+        overhead low.
+    progress: function (optional)
+        Called with (games done, invalid games, seconds elapsed) after every batch.
+
+    Returns
+    _______
+    A generator of (file name, game index, fen, termination marker, error, plies) rows in the order of games.
+    """
+    workers = workers or os.cpu_count()
+    start, done, errors = time.perf_counter(), 0, 0
+    for batch, results in _validate_batches(iter(games), workers, chunk_size):
+        for (file_name, index, game), result in zip(batch, results):
+            errors += result[2] is not None
+            yield (file_name, index) + result
+        done += len(batch)
+        if progress is not None:
+            progress(done, errors, time.perf_counter() - start)
+
+
+def _validate_batches(games, workers, chunk_size):
+    """Yields (batch, results) pairs. With a pool the next batch is submitted before a batch's results are waited on."""
+    batch_size = workers * chunk_size * BATCH_CHUNKS
+    batch = list(islice(games, batch_size))
+    if workers == 1:
+        while batch:
+            yield batch, [validate_game(game[2]) for game in batch]
+            batch = list(islice(games, batch_size))
+        return
+    with Pool(workers) as pool:
+        pending = _submit(pool, batch, workers, chunk_size)
+        while batch:
+            next_batch = list(islice(games, batch_size))
+            next_pending = _submit(pool, next_batch, workers, chunk_size)
+            yield batch, pending.get()
+            batch, pending = next_batch, next_pending
+
+
+def _submit(pool, batch, workers, chunk_size):
+    #a short batch (the last one, or a small database) is split so that every worker gets a share of it
+    chunk_size = max(1, min(chunk_size, len(batch) // workers))
+    return pool.map_async(validate_game, [game[2] for game in batch], chunk_size)
+
+
+def games_per_second(games, seconds): return int(games / seconds) if seconds > 0 else 0
+
+
+def parse_args():
+    """Parse arguments from the command line."""
+    parser = argparse.ArgumentParser(description="Pyanchetto bulk PGN validator.")
+    parser.add_argument('path', type=str, help="A PGN file with one or more games, or a directory of PGN files (may be gzip or bzip2 compressed).")
+    parser.add_argument('-o', '--output', type=str, default=None, help="Write the tab separated report to this file instead of stdout.", required=False)
+    parser.add_argument('-w', '--workers', type=int, default=None, help="Number of worker processes (defaults to the CPU count, 1 disables the pool).", required=False)
+    parser.add_argument('--chunk-size', type=int, default=16, help="Number of games handed to a worker at a time.", required=False)
+    parser.add_argument('-q', '--quiet', action='store_true', help="Do not report progress.", required=False)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    out = open(args.output, "w") if args.output else sys.stdout
+
+    def report_progress(done, errors, seconds):
+        if not args.quiet:
+            print(done, "games", errors, "invalid", games_per_second(done, seconds), "games/s", file=sys.stderr)
+
+    start = time.perf_counter()
+    done, errors = 0, 0
+    try:
+        print("\t".join(report_columns), file=out)
+        for row in validate_games(iter_games(args.path), args.workers, args.chunk_size, report_progress):
+            print("\t".join("" if value is None else str(value) for value in row), file=out)
+            done += 1
+            errors += row[4] is not None
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    seconds = time.perf_counter() - start
+    print(done, "games", errors, "invalid", round(seconds, 2), "s", games_per_second(done, seconds), "games/s",
+          file=sys.stderr)
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
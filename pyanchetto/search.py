@@ -0,0 +1,291 @@
+"""
+Iterative deepening negamax search with alpha-beta pruning.
+
+Every iteration searches the root moves one ply deeper than the last, starting with the best moves of the previous
+iteration, and stores bounds and best moves in a transposition table keyed by Zobrist key. Moves are ordered by
+MoveOrdering (table move, MVV-LVA captures, killers, history), which is what makes the shallow iterations pay for
+themselves. At the horizon a quiescence search keeps resolving captures (skipping those that lose material by static
+exchange evaluation) until the position is quiet, so a score is never taken in the middle of an exchange. The search
+walks a single copy of the board with make_move/unmake_move and works on packed moves (see move_encoding.py).
+
+A search can be limited by depth, by time and by node count, and can be stopped from another thread with stop().
+Scores are in centipawns from the point of view of the player to move at the root (see evaluation.py).
+"""
+import time
+
+from pyanchetto.chess import Chess
+from pyanchetto.evaluation import evaluate, static_exchange, track_evaluation, MATE, MATE_BOUND
+from pyanchetto.move_encoding import NULL_MOVE, PROMOTION, to_uci
+from pyanchetto.move_ordering import MoveOrdering, is_capture, mvv_lva, MAX_PLY
+from pyanchetto.move_tree import MoveTree
+
+INFINITY = MATE + 1
+MAX_DEPTH = 64
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+TABLE_SIZE = 1 << 18
+TIME_CHECK_INTERVAL = 63 #the clock is read once every TIME_CHECK_INTERVAL + 1 nodes and after every root move
+
+
+class SearchResult(object):
+    """
+    The outcome of the deepest completed iteration. tree is a MoveTree whose children are the root moves, ordered
+    best first, with their scores in MoveTree.heuristic (an upper bound for every move but the best one).
+    """
+
+    def __init__(self):
+        self.best_move = NULL_MOVE
+        self.score = 0
+        self.pv = []
+        self.depth = 0
+        self.nodes = 0
+        self.seconds = 0.0
+        self.tree = MoveTree("Root")
+        self.ordering = {} #MoveOrdering.stats()
+
+    def nps(self):
+        return int(self.nodes / self.seconds) if self.seconds > 0 else 0
+
+    def pv_uci(self):
+        return " ".join(to_uci(move) for move in self.pv)
+
+
+class Search(object):
+
+    def __init__(self, table_size=TABLE_SIZE):
+        #table[zobrist_key] = (depth, score, bound, best move), cleared when it holds table_size entries
+        self.table = {}
+        self.table_size = table_size
+        self.ordering = MoveOrdering()
+        self.nodes = 0
+        self.stopped = False
+        self.deadline = None
+        self.node_limit = None
+
+
+    def stop(self):
+        """Ask a running search to return the result of its last completed iteration as soon as possible."""
+        self.stopped = True
+
+
+    def clear(self):
+        """Forget everything learned in previous searches (e.g. before a new game)."""
+        self.table = {}
+        self.ordering = MoveOrdering()
+
+
+    def search(self, board, max_depth=MAX_DEPTH, time_limit=None, node_limit=None, callback=None):
+        """
+        Search a position with iterative deepening.
+
+        Parameters
+        ----------
+        board: Chess
+            The position to search. It is copied, so the caller's board is never modified.
+        max_depth: int (optional)
+            The deepest iteration to run.
+        time_limit: float (optional)
+            Seconds after which the search is stopped.
+        node_limit: int (optional)
+            Number of nodes after which the search is stopped.
+        callback: function (optional)
+            Called with the SearchResult after every completed iteration.
+
+        Returns
+        _______
+        A SearchResult. If the budget runs out during an iteration, moves that iteration finished searching are
+        still used when they beat the previous best move.
+        """
+        start = time.perf_counter()
+        board = Chess(board)
+        track_evaluation(board)
+        self.stopped, self.nodes = False, 0
+        self.deadline = start + time_limit if time_limit is not None else None
+        self.node_limit = node_limit
+        self.ordering.new_search()
+        result = SearchResult()
+        root_moves = list(board.valid_moves_encoded())
+        if not root_moves:
+            result.score = -MATE if board.in_check(board.current_player) else 0
+            return result
+        for depth in range(1, max_depth + 1):
+            scores = {}
+            best_move, score = self.__root(board, depth, root_moves, scores)
+            if best_move == NULL_MOVE:
+                break
+            root_moves.sort(key=lambda move: -scores.get(move, -INFINITY))
+            result.best_move, result.score = best_move, score
+            result.depth = depth if not self.stopped else depth - 1
+            result.pv = self.principal_variation(board, depth)
+            result.tree = self.__root_tree(root_moves, scores, score)
+            result.nodes, result.seconds = self.nodes, time.perf_counter() - start
+            if self.stopped:
+                break
+            if callback is not None:
+                callback(result)
+            if abs(score) >= MATE_BOUND and MATE - abs(score) <= depth: #the shortest mate has been found
+                break
+        if result.best_move == NULL_MOVE: #stopped before the first move was searched
+            result.best_move = root_moves[0]
+        result.nodes, result.seconds = self.nodes, time.perf_counter() - start
+        result.ordering = self.ordering.stats()
+        return result
+
+
+    def principal_variation(self, board, max_length):
+        """The line of best moves stored in the table, starting from the board's position."""
+        pv = []
+        seen = set()
+        while len(pv) < max_length and board.zobrist_key not in seen:
+            seen.add(board.zobrist_key)
+            entry = self.table.get(board.zobrist_key)
+            if entry is None or entry[3] == NULL_MOVE or entry[3] not in board.valid_moves_encoded():
+                break
+            pv.append(entry[3])
+            board.make_move(entry[3])
+        for move in pv:
+            board.unmake_move()
+        return pv
+
+
+    def __root(self, board, depth, moves, scores):
+        alpha, best_move = -INFINITY, NULL_MOVE
+        for move in moves:
+            board.make_move(move)
+            score = -self.__negamax(board, depth - 1, -INFINITY, -alpha, 1)
+            board.unmake_move()
+            if self.stopped:
+                break
+            scores[move] = score
+            if score > alpha:
+                alpha, best_move = score, move
+            self.__check_time() #a finished move still counts, the next one is not started
+            if self.stopped:
+                break
+        if best_move != NULL_MOVE:
+            self.__store(board.zobrist_key, depth, alpha, EXACT, best_move, 0)
+        return best_move, alpha
+
+
+    def __root_tree(self, moves, scores, score):
+        root = MoveTree("Root")
+        root.heuristic = score
+        for move in moves:
+            if move in scores:
+                child = MoveTree(move)
+                child.heuristic = scores[move]
+                root.children.append(child)
+        return root
+
+
+    def quiescence(self, board, alpha=-INFINITY, beta=INFINITY, ply=0):
+        """
+        Capture-only search of a position. The player to move may stand pat on the static evaluation or try the
+        captures and promotions that do not lose material by static exchange evaluation, best victims first. In check
+        standing pat is not allowed and every evasion is searched, so mates at the horizon are still seen. Also
+        usable on its own to score a position once its pending tactics are resolved.
+        """
+        if self.__count_node():
+            return 0
+        check = board.in_check(board.current_player)
+        best = -INFINITY
+        if not check:
+            best = evaluate(board)
+            if best >= beta or ply >= MAX_PLY:
+                return best
+            alpha = max(alpha, best)
+            moves = [move for move in board.valid_moves_encoded()
+                     if (is_capture(board, move) or (move >> 12 & 3) == PROMOTION) and static_exchange(board, move) >= 0]
+            moves.sort(key=lambda move: -mvv_lva(board, move))
+        else:
+            moves = [move for stage, move in self.ordering.pick(board, NULL_MOVE, MAX_PLY)]
+            if not moves:
+                return -MATE + ply
+        for move in moves:
+            board.make_move(move)
+            score = -self.quiescence(board, -beta, -alpha, ply + 1)
+            board.unmake_move()
+            if self.stopped:
+                return 0
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best
+
+
+    def __count_node(self):
+        """Counts a node and returns True when the search has to stop."""
+        self.nodes += 1
+        if (self.nodes & TIME_CHECK_INTERVAL) == 0:
+            self.__check_time()
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            self.stopped = True
+        return self.stopped
+
+
+    def __check_time(self):
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.stopped = True
+
+
+    def __negamax(self, board, depth, alpha, beta, ply):
+        if depth <= 0:
+            return self.quiescence(board, alpha, beta, ply)
+        if self.__count_node():
+            return 0
+        if board.half_move_clock >= 100 or board.repetitions() >= 2:
+            return 0
+        key = board.zobrist_key
+        entry = self.table.get(key)
+        hash_move = NULL_MOVE
+        if entry is not None:
+            hash_move = entry[3]
+            if entry[0] >= depth:
+                score, bound = self.__score_from_table(entry[1], ply), entry[2]
+                if bound == EXACT or (bound == LOWER_BOUND and score >= beta) or \
+                        (bound == UPPER_BOUND and score <= alpha):
+                    return score
+        ordering = self.ordering
+        original_alpha, best, best_move = alpha, -INFINITY, NULL_MOVE
+        move_number = 0
+        for stage, move in ordering.pick(board, hash_move, ply):
+            ordering.searched(stage)
+            board.make_move(move)
+            score = -self.__negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.unmake_move()
+            if self.stopped:
+                return 0
+            if score > best:
+                best, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        ordering.cutoff(board, stage, move, ply, depth, move_number)
+                        break
+            move_number += 1
+        if best_move == NULL_MOVE: #no legal moves
+            return -MATE + ply if board.in_check(board.current_player) else 0
+        bound = UPPER_BOUND if best <= original_alpha else LOWER_BOUND if best >= beta else EXACT
+        self.__store(key, depth, best, bound, best_move, ply)
+        return best
+
+
+    def __store(self, key, depth, score, bound, move, ply):
+        if len(self.table) >= self.table_size and key not in self.table:
+            self.table.clear()
+        #mate scores are stored relative to the node so they stay correct when reached through another path
+        if score >= MATE_BOUND:
+            score += ply
+        elif score <= -MATE_BOUND:
+            score -= ply
+        self.table[key] = (depth, score, bound, move)
+
+
+    def __score_from_table(self, score, ply):
+        if score >= MATE_BOUND:
+            return score - ply
+        if score <= -MATE_BOUND:
+            return score + ply
+        return score
@@ -0,0 +1,164 @@
+"""
+Universal Chess Interface (UCI) front end.
+
+Reads UCI commands from stdin and answers on stdout so the engine can be driven by tournament managers and GUIs:
+
+    python -m pyanchetto.uci
+
+Searches run in a background thread so isready and stop are answered while the engine is thinking. Every completed
+iteration is reported with an info line (depth, score, nodes, nps, time and principal variation) and the search ends
+with a bestmove line. Under go infinite and go ponder the bestmove line is held back until stop (or ponderhit), even
+if the search finishes early by finding a mate or reaching its maximum depth.
+"""
+import sys
+import threading
+
+from pyanchetto.chess import Chess, BadFenException, WHITE
+from pyanchetto.evaluation import MATE, MATE_BOUND
+from pyanchetto.move_encoding import NULL_MOVE, to_uci
+from pyanchetto.search import Search, MAX_DEPTH
+
+ENGINE_NAME = "Pyanchetto"
+ENGINE_AUTHOR = "Eric Wimberley"
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+MOVES_TO_GO = 30 #assumed number of moves left when the time control does not say
+
+
+class UciEngine(object):
+
+    def __init__(self, out=sys.stdout):
+        self.out = out
+        self.out_lock = threading.Lock()
+        self.board = Chess()
+        self.search = Search()
+        self.thread = None
+        self.release = threading.Event() #set when a bestmove may be sent
+
+
+    def send(self, line):
+        with self.out_lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+
+
+    def handle(self, line):
+        """Handle one line of input. Returns False when the engine should exit."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == "uci":
+            self.send("id name " + ENGINE_NAME)
+            self.send("id author " + ENGINE_AUTHOR)
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "ucinewgame":
+            self.stop()
+            self.search.clear()
+            self.board = Chess()
+        elif command == "position":
+            self.stop()
+            self.position(args)
+        elif command == "go":
+            self.stop()
+            self.go(args)
+        elif command == "stop":
+            self.stop()
+        elif command == "ponderhit":
+            self.release.set()
+        elif command == "quit":
+            self.stop()
+            return False
+        return True
+
+
+    def position(self, args):
+        """position [startpos | fen <fen>] [moves <move> ...]"""
+        moves = args.index("moves") if "moves" in args else len(args)
+        if args and args[0] == "fen":
+            fen = " ".join(args[1:moves])
+        else:
+            fen = START_FEN
+        try:
+            board = Chess.from_fen(fen)
+        except BadFenException:
+            self.send("info string invalid fen " + fen)
+            return
+        for uci in args[moves + 1:]:
+            try:
+                move = board.move_from_uci(uci)
+            except (KeyError, IndexError):
+                move = NULL_MOVE
+            if move not in board.valid_moves_encoded():
+                self.send("info string illegal move " + uci)
+                break
+            board.make_move(move)
+        self.board = board
+
+
+    def go(self, args):
+        """go [depth <plies>] [movetime <ms>] [nodes <n>] [wtime/btime/winc/binc <ms>] [movestogo <n>] [infinite] [ponder]"""
+        options = {}
+        for i, token in enumerate(args):
+            if i + 1 < len(args) and args[i + 1].lstrip("-").isdigit():
+                options[token] = int(args[i + 1])
+        depth = options.get("depth", MAX_DEPTH)
+        time_limit = None
+        if "movetime" in options:
+            time_limit = options["movetime"] / 1000
+        elif "infinite" not in args:
+            side = "w" if self.board.current_player == WHITE else "b"
+            if side + "time" in options:
+                budget = options[side + "time"] / options.get("movestogo", MOVES_TO_GO) + options.get(side + "inc", 0) / 2
+                time_limit = max(budget, 1) / 1000
+        board = Chess(self.board)
+        if "infinite" in args or "ponder" in args:
+            self.release.clear()
+        else:
+            self.release.set()
+        self.thread = threading.Thread(target=self.__search, args=(board, depth, time_limit, options.get("nodes")))
+        self.thread.daemon = True
+        self.thread.start()
+
+
+    def stop(self):
+        """Stop a running search and wait until its bestmove has been sent."""
+        self.release.set()
+        while self.thread is not None and self.thread.is_alive():
+            self.search.stop()
+            self.thread.join(0.01)
+        self.thread = None
+
+
+    def __search(self, board, depth, time_limit, node_limit):
+        result = self.search.search(board, depth, time_limit, node_limit, self.__info)
+        self.release.wait()
+        self.send("bestmove " + (to_uci(result.best_move) if result.best_move != NULL_MOVE else "0000"))
+
+
+    def __info(self, result):
+        self.send("info depth {} score {} nodes {} nps {} time {} pv {}".format(
+            result.depth, score_str(result.score), result.nodes, result.nps(), int(result.seconds * 1000),
+            result.pv_uci()))
+
+
+def score_str(score):
+    """A search score in UCI notation, either centipawns or moves until mate (negative when getting mated)."""
+    if score >= MATE_BOUND:
+        return "mate " + str((MATE - score + 1) // 2)
+    if score <= -MATE_BOUND:
+        return "mate " + str(-((MATE + score + 1) // 2))
+    return "cp " + str(score)
+
+
+def main():
+    engine = UciEngine()
+    for line in sys.stdin:
+        if not engine.handle(line):
+            return
+    if engine.thread is not None: #end of input, let a running search finish
+        engine.thread.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""
+Random 64-bit keys for Zobrist hashing of chess positions.
+
+A position key is the XOR of the key of every piece on its square, the key of the current castling rights, the key
+of the en pessant file (only when the side to move has a pawn that could capture en pessant) and side_key when black
+is to move. The keys come from a fixed seed so position keys are stable across processes and runs.
+"""
+import random
+
+from pyanchetto.bitboard import SQUARES
+
+SEED = 0x5EED_C4E55
+_rng = random.Random(SEED)
+
+#piece_keys[piece][square] with pieces indexed like chess.pieces (index 0, the empty square, is all zeros)
+piece_keys = tuple(tuple(_rng.getrandbits(64) if piece else 0 for sq in range(SQUARES)) for piece in range(13))
+#castling_keys[rights] where rights has one bit per entry of chess.rook_positions that may still castle
+castling_keys = tuple(_rng.getrandbits(64) if rights else 0 for rights in range(16))
+en_passant_keys = tuple(_rng.getrandbits(64) for f in range(8))
+side_key = _rng.getrandbits(64)
@@ -0,0 +1,32 @@
+import unittest
+
+from pyanchetto.attacks import *
+from pyanchetto.bitboard import iter_coords, square
+
+
+class TestAttacks(unittest.TestCase):
+
+    def test_knight_attacks(self):
+        assert set(iter_coords(knight_attacks[square((0, 0))])) == {(1, 2), (2, 1)}
+        assert len(knight_moves[square((4, 4))]) == 8
+
+    def test_king_attacks(self):
+        assert set(iter_coords(king_attacks[square((7, 7))])) == {(6, 7), (6, 6), (7, 6)}
+
+    def test_pawn_attacks(self):
+        assert set(iter_coords(pawn_attacks[0][square((0, 1))])) == {(1, 2)}
+        assert set(iter_coords(pawn_attacks[1][square((4, 6))])) == {(3, 5), (5, 5)}
+
+    def test_ray_moves_outward(self):
+        assert ray_moves[NORTH_EAST][square((0, 0))][:3] == ((1, 1, True), (2, 2, True), (3, 3, True))
+        assert ray_moves[WEST][square((3, 0))] == ((2, 0, True), (1, 0, True), (0, 0, True))
+
+    def test_sliding_attacks(self):
+        blockers = (1 << square((4, 6))) | (1 << square((2, 4)))
+        rook = set(iter_coords(rook_attacks(square((4, 4)), blockers)))
+        assert (4, 6) in rook and (4, 7) not in rook
+        assert (2, 4) in rook and (1, 4) not in rook
+        assert len(rook) == 2 + 4 + 3 + 2
+        bishop = set(iter_coords(bishop_attacks(square((0, 0)), 1 << square((3, 3)))))
+        assert bishop == {(1, 1), (2, 2), (3, 3)}
+        assert queen_attacks(square((0, 0)), 0) == rook_attacks(square((0, 0)), 0) | bishop_attacks(square((0, 0)), 0)
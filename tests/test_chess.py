@@ -1,3 +1,4 @@
+import random
 import unittest
 
 from pyanchetto.chess import *
@@ -22,6 +23,19 @@ class TestChess(unittest.TestCase):
                 colors.append(self.board.color((j, i)))
         assert colors == true_colors
 
+    def test_bitboards(self):
+        assert self.board.occupancy[WHITE] == 0xFFFF
+        assert self.board.occupancy[BLACK] == 0xFFFF << 48
+        assert self.board.bitboards[pieces_index["K"]] == 1 << 4
+        self.board.move((4, 1), (4, 3, False))
+        self.board.move((3, 6), (3, 4, False))
+        self.board.move((4, 3), (3, 4, True))
+        rebuilt = Chess(self.board)
+        rebuilt.init_player_pieces()
+        assert self.board.bitboards == rebuilt.bitboards
+        assert self.board.occupancy == rebuilt.occupancy
+        assert self.board.occupancy[BLACK] & (1 << 35) == 0
+
     def test_valid_pawn_moves(self):
         black_pawn_true_moves = [(0, 2, False), (0, 3, False)]
         black_pawn_moves = list(self.board._Chess__pawn(0, 1))
@@ -30,6 +44,7 @@ class TestChess(unittest.TestCase):
     def test_valid_promotion_moves(self):
         self.board.board = self.empty_board()
         self.board.board[6][4] = 6
+        self.board.init_player_pieces()
         white_pawn_true_moves = [(4, 7, False, 'Q'), (4, 7, False, 'R'), (4, 7, False, 'B'), (4, 7, False, 'N')] 
         white_pawn_moves = list(self.board._Chess__pawn(4, 6))
         assert white_pawn_moves == white_pawn_true_moves
@@ -37,6 +52,7 @@ class TestChess(unittest.TestCase):
     def test_valid_rook_moves(self):
         self.board.board = self.empty_board()
         self.board.board[4][4] = 3
+        self.board.init_player_pieces()
         true_moves = [(4, 5, True), (4, 6, True), (4, 7, True), (4, 3, True), (4, 2, True), (4, 1, True), (4, 0, True),
                       (5, 4, True), (6, 4, True), (7, 4, True), (3, 4, True), (2, 4, True), (1, 4, True), (0, 4, True)]
         moves = list(self.board._Chess__rook(4, 4))
@@ -45,16 +61,26 @@ class TestChess(unittest.TestCase):
     def test_valid_bishop_moves(self):
         self.board.board = self.empty_board()
         self.board.board[4][4] = 4
+        self.board.init_player_pieces()
         true_moves = [(5, 5, True), (6, 6, True), (7, 7, True), (3, 3, True), (2, 2, True), (1, 1, True),
                       (0, 0, True), (3, 5, True), (2, 6, True), (1, 7, True), (5, 3, True), (6, 2, True), (7, 1, True)]
         moves = list(self.board._Chess__bishop(4, 4))
         assert moves == true_moves
 
-    #TODO test knight moves
+    def test_valid_knight_moves(self):
+        self.board.board = self.empty_board()
+        self.board.board[0][1] = 5
+        self.board.board[1][3] = 6
+        self.board.board[2][2] = 12
+        self.board.init_player_pieces()
+        true_moves = [(2, 2, True), (0, 2, True)]
+        moves = list(self.board._Chess__knight(1, 0))
+        assert moves == true_moves
 
     def test_valid_queen_moves(self):
         self.board.board = self.empty_board()
         self.board.board[4][4] = 2
+        self.board.init_player_pieces()
         true_moves = [(5, 5, True), (6, 6, True), (7, 7, True), (3, 3, True), (2, 2, True), (1, 1, True), (0, 0, True),
                       (3, 5, True), (2, 6, True), (1, 7, True), (5, 3, True), (6, 2, True), (7, 1, True), (4, 5, True),
                       (4, 6, True), (4, 7, True), (4, 3, True), (4, 2, True), (4, 1, True), (4, 0, True), (5, 4, True),
@@ -66,6 +92,7 @@ class TestChess(unittest.TestCase):
         self.board.board = self.empty_board()
         self.board.board[4][4] = 1
         self.board.kings_moved[0] = True
+        self.board.init_player_pieces()
         true_moves = [(5, 5, True), (3, 3, True), (5, 3, True), (3, 5, True), (4, 5, True), (4, 3, True),
                       (5, 4, True), (3, 4, True)]
         moves = list(self.board._Chess__king(4, 4))
@@ -92,6 +119,68 @@ class TestChess(unittest.TestCase):
         #print(self.board.fen())
         assert self.board.fen() == "r4rk1/8/8/8/8/8/8/2KR3R w - - 2 2"
 
+    def assert_unmake_restores(self, fromc, to):
+        fen, bitboards = self.board.fen(), list(self.board.bitboards)
+        rights = (list(self.board.rooks_moved), list(self.board.kings_moved), list(self.board.kings_castled))
+        self.board.make_move(fromc, to)
+        self.board.unmake_move()
+        assert self.board.fen() == fen
+        assert self.board.bitboards == bitboards
+        assert (self.board.rooks_moved, self.board.kings_moved, self.board.kings_castled) == rights
+
+    def test_make_unmake_en_pessant(self):
+        for fromc, to in [((4, 1), (4, 3, False)), ((0, 6), (0, 5, False)), ((4, 3), (4, 4, False)),
+                          ((3, 6), (3, 4, False))]:
+            self.board.move(fromc, to)
+        assert self.board.en_passant == (3, 5)
+        self.assertIn((3, 5, False, 6), list(self.board.valid_piece_moves((4, 4))))
+        self.board.make_move((4, 4), (3, 5, False, 6))
+        assert self.board.get_coord((3, 4)) == EMPTY
+        assert self.board.en_passant is None
+        self.board.unmake_move()
+        assert self.board.en_passant == (3, 5)
+        self.assert_unmake_restores((4, 4), (3, 5, False, 6))
+
+    def test_make_unmake_promotion(self):
+        self.board.board = self.empty_board()
+        self.board.board[6][0] = 6
+        self.board.board[0][4] = 1
+        self.board.board[7][7] = 9
+        self.board.board[3][4] = 7
+        self.board.init_player_pieces()
+        self.board.make_move((0, 6), (0, 7, False, "Q"))
+        assert self.board.get_coord((0, 7)) == pieces_index["Q"]
+        self.board.unmake_move()
+        assert self.board.get_coord((0, 6)) == pieces_index["P"]
+        self.assert_unmake_restores((0, 6), (0, 7, False, "N"))
+
+    def test_make_unmake_castle(self):
+        self.board.board = self.empty_board()
+        self.board.board[0][4] = 1
+        self.board.board[0][0] = 3
+        self.board.board[0][7] = 3
+        self.board.board[7][4] = 7
+        self.board.board[7][7] = 9
+        self.board.init_player_pieces()
+        self.assert_unmake_restores((4, 0), (6, 0, False))
+        self.assert_unmake_restores((4, 0), (2, 0, False))
+        self.board.make_move((0, 0), (0, 1, True))
+        self.assert_unmake_restores((4, 7), (6, 7, False))
+        self.assert_unmake_restores((7, 7), (7, 0, True))
+
+    def test_capturing_rook_removes_castling(self):
+        self.board.board = self.empty_board()
+        self.board.board[0][4] = 1
+        self.board.board[0][7] = 3
+        self.board.board[7][4] = 7
+        self.board.board[7][7] = 9
+        self.board.init_player_pieces()
+        self.board.make_move((7, 0), (7, 7, True))
+        assert self.board.rooks_moved[3] == 0
+        assert (6, 7, False) not in list(self.board.valid_piece_moves((4, 7)))
+        self.board.unmake_move()
+        assert self.board.rooks_moved[3] == -1
+
     def test_valid_opening_moves(self):
         moves = self.board.valid_moves()
         assert 16 == len(moves)
@@ -110,6 +199,202 @@ class TestChess(unittest.TestCase):
         assert self.board.in_check(self.board.current_player)
         #TODO check that non-threatening moves do not place king in check
 
+    def test_is_attacked(self):
+        self.board.board = self.empty_board()
+        self.board.board[0][4] = 1
+        self.board.board[7][4] = 7
+        self.board.board[4][0] = 10
+        self.board.board[2][5] = 11
+        self.board.board[4][7] = 9
+        self.board.board[4][6] = 6
+        self.board.init_player_pieces()
+        assert self.board.is_attacked((3, 1), BLACK) #bishop
+        assert self.board.is_attacked((4, 0), BLACK) #knight
+        assert self.board.in_check(WHITE)
+        assert self.board.is_attacked((7, 0), BLACK) #rook
+        assert not self.board.is_attacked((5, 4), BLACK) #rook blocked by pawn
+        assert self.board.is_attacked((5, 5), WHITE) #pawn
+        assert not self.board.is_attacked((6, 5), WHITE)
+        assert self.board.attackers((4, 0), BLACK) == (1 << 21) | (1 << 32)
+        assert not self.board.in_check(BLACK)
+
+    def test_castle_through_check(self):
+        self.board.board = self.empty_board()
+        self.board.board[0][4] = 1
+        self.board.board[0][0] = 3
+        self.board.board[0][7] = 3
+        self.board.board[7][4] = 7
+        self.board.board[5][3] = 9
+        self.board.board[5][1] = 9
+        self.board.init_player_pieces()
+        moves = list(self.board.valid_piece_moves((4, 0)))
+        assert (6, 0, False) in moves
+        assert (2, 0, False) not in moves #d1 attacked
+        self.board.board[5][3] = 0
+        self.board.init_player_pieces()
+        moves = list(self.board.valid_piece_moves((4, 0)))
+        assert (2, 0, False) in moves #b1 may be attacked
+        self.board.board[0][1] = 5
+        self.board.init_player_pieces()
+        moves = list(self.board.valid_piece_moves((4, 0)))
+        assert (2, 0, False) not in moves #b1 occupied
+        self.board.board[5][4] = 9
+        self.board.init_player_pieces()
+        moves = list(self.board.valid_piece_moves((4, 0)))
+        assert (6, 0, False) not in moves #in check
+
+    def move_set(self, mode):
+        moves = self.board.valid_moves(mode)
+        return {(piece, move) for piece in moves for move in moves[piece]}
+
+    def test_masked_moves_match_simulation(self):
+        rng = random.Random(7)
+        for game in range(4):
+            self.board = Chess()
+            for ply in range(60):
+                moves = self.move_set(VALIDATE_MASKS)
+                assert moves == self.move_set(VALIDATE_SIMULATE)
+                if len(moves) == 0:
+                    break
+                piece, move = rng.choice(sorted(moves, key=str))
+                self.board.make_move(piece, move)
+
+    def test_masked_moves_pins(self):
+        self.board.board = self.empty_board()
+        self.board.board[4][0] = 1
+        self.board.board[4][1] = 6
+        self.board.board[6][2] = 12
+        self.board.board[4][7] = 9
+        self.board.board[7][4] = 7
+        self.board.board[2][0] = 3
+        self.board.board[0][0] = 8
+        self.board.board[2][2] = 5
+        self.board.board[1][3] = 10
+        self.board.init_player_pieces()
+        self.board.current_player = BLACK
+        self.board.move((2, 6), (2, 4, False))
+        moves = self.move_set(VALIDATE_MASKS)
+        assert moves == self.move_set(VALIDATE_SIMULATE)
+        assert ((1, 4), (2, 5, False, 6)) not in moves #en pessant exposes the king along the rank
+        assert ((1, 4), (1, 5, False)) in moves
+        rook_moves = {m[1] for m in moves if m[0] == (0, 2)}
+        assert rook_moves == {(0, 3, True), (0, 1, True), (0, 0, True)} #pinned on the file by the queen
+        assert not [m for m in moves if m[0] == (2, 2)] #knight pinned by the bishop
+
+    def test_masked_moves_check_evasion(self):
+        self.board.board = self.empty_board()
+        self.board.board[0][4] = 1
+        self.board.board[0][1] = 5
+        self.board.board[2][1] = 5
+        self.board.board[7][4] = 7
+        self.board.board[4][0] = 10
+        self.board.init_player_pieces()
+        moves = self.move_set(VALIDATE_MASKS)
+        assert moves == self.move_set(VALIDATE_SIMULATE)
+        assert {m for m in moves if m[0] != (4, 0)} == {((1, 0), (3, 1, True)), ((1, 0), (2, 2, True)),
+                                                        ((1, 2), (3, 1, True)), ((1, 2), (0, 4, True))}
+        self.board.board[3][4] = 9
+        self.board.init_player_pieces()
+        moves = self.move_set(VALIDATE_MASKS)
+        assert moves == self.move_set(VALIDATE_SIMULATE)
+        assert {m[0] for m in moves} == {(4, 0)} #double check
+
+    def test_resolve_san(self):
+        rng = random.Random(5)
+        for game in range(3):
+            self.board = Chess()
+            for ply in range(80):
+                moves = self.move_set(VALIDATE_MASKS)
+                if not moves:
+                    break
+                for piece_type in piece_types:
+                    for to in all_coords:
+                        expected = {(piece, move) for piece, move in moves if move[:2] == to
+                                    and self.board.is_type(piece, piece_type)}
+                        resolved = self.board.resolve_san(piece_type, to)
+                        assert (resolved is None) == (not expected)
+                        assert resolved is None or resolved in expected
+                piece, move = rng.choice(sorted(moves, key=str))
+                self.board.make_move(piece, move)
+
+    def test_resolve_san_special_moves(self):
+        self.board.board = self.empty_board()
+        self.board.board[4][0] = 1
+        self.board.board[4][1] = 6
+        self.board.board[6][2] = 12
+        self.board.board[4][7] = 9
+        self.board.board[7][4] = 7
+        self.board.board[0][0] = 5
+        self.board.board[0][4] = 5
+        self.board.board[6][1] = 6
+        self.board.board[7][2] = 10
+        self.board.init_player_pieces()
+        self.board.current_player = BLACK
+        self.board.move((2, 6), (2, 4, False))
+        assert self.board.resolve_san("P", (2, 5), from_file=1) is None #en pessant exposes the king along the rank
+        assert self.board.resolve_san("P", (1, 5)) == ((1, 4), (1, 5, False))
+        assert self.board.resolve_san("N", (2, 1), from_file=4) == ((4, 0), (2, 1, True))
+        assert self.board.resolve_san("N", (2, 1), from_file=0) == ((0, 0), (2, 1, True))
+        assert self.board.resolve_san("N", (2, 1), from_rank=1) is None
+        assert self.board.resolve_san("P", (2, 7), from_file=1, promotion="N") == ((1, 6), (2, 7, True, "N"))
+        assert self.board.resolve_san("P", (1, 7)) == ((1, 6), (1, 7, False, "Q"))
+        assert self.board.resolve_san("P", (1, 5), promotion="Q") is None
+        self.board = Chess()
+        for san in ("e4", "a6", "e5", "d5"):
+            self.board.move(self.board.move_from_san(san))
+        assert self.board.resolve_san("P", (3, 5), from_file=4) == ((4, 4), (3, 5, False, 6))
+        assert self.board.resolve_san("P", (3, 4)) is None #the d pawn cannot push onto the pawn that passed it
+
+    def test_san_disambiguation(self):
+        board = Chess.from_fen("4k3/8/8/1N6/8/8/4N3/4K3 w - - 0 1")
+        assert board.san((1, 4), (3, 3, True)) == "Nbd4"
+        board = Chess.from_fen("4r1k1/8/8/1N6/8/8/4N3/4K3 w - - 0 1")
+        assert board.san((1, 4), (3, 3, True)) == "Nd4" #the knight on e2 is pinned
+        board = Chess.from_fen("4k3/8/8/1N6/8/1N6/8/4K3 w - - 0 1")
+        assert board.san((1, 4), (3, 3, True)) == "N5d4"
+        board = Chess.from_fen("4k3/8/8/1N3N2/8/1N6/8/4K3 w - - 0 1")
+        assert board.san((1, 4), (3, 3, True)) == "Nb5d4"
+
+    def test_zobrist_incremental(self):
+        rng = random.Random(3)
+        keys = [self.board.zobrist_key]
+        for ply in range(120):
+            moves = self.board.valid_moves_encoded()
+            if not moves:
+                break
+            self.board.make_move(rng.choice(moves))
+            assert self.board.zobrist_key == self.board.compute_zobrist_key()
+            keys.append(self.board.zobrist_key)
+        while self.board.move_list:
+            assert self.board.zobrist_key == keys.pop()
+            self.board.unmake_move()
+        assert self.board.zobrist_key == keys.pop() == Chess().zobrist_key
+
+    def test_zobrist_transposition(self):
+        other = Chess()
+        for san in ("Nf3", "Nf6", "Nc3"):
+            self.board.move(self.board.move_from_san(san))
+        for san in ("Nc3", "Nf6", "Nf3"):
+            other.move(other.move_from_san(san))
+        assert self.board.zobrist_key == other.zobrist_key
+        self.board.move(self.board.move_from_san("e5"))
+        other.move(other.move_from_san("e6"))
+        assert self.board.zobrist_key != other.zobrist_key
+        for san in ("Ng1", "Ng8", "Nf3", "Nf6"): #castling rights and side to move are unchanged
+            self.board.move(self.board.move_from_san(san))
+        assert self.board.zobrist_key == self.board.compute_zobrist_key()
+
+    def test_zobrist_en_pessant(self):
+        for san in ("e4", "a6", "e5", "d5"):
+            self.board.move(self.board.move_from_san(san))
+        with_ep = self.board.zobrist_key
+        self.board.en_passant = None
+        assert with_ep != self.board.compute_zobrist_key()
+        self.board = Chess()
+        self.board.move(self.board.move_from_san("e4")) #no black pawn can capture, so the key ignores the target
+        self.board.en_passant = None
+        assert self.board.zobrist_key == self.board.compute_zobrist_key()
+
     def test_captured(self):
         self.board.board = self.empty_board()
         self.board.captured_pieces[0] = (6, (4,4))
@@ -149,6 +434,119 @@ class TestChess(unittest.TestCase):
         self.board.init_player_pieces()
         self.assertEqual(DRAW, self.board.game_state())
 
+    def test_from_fen(self):
+        board = Chess.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R b Kq a3 0 1")
+        assert board.get_coord((4, 3)) == pieces_index["P"]
+        assert board.get_coord((0, 5)) == pieces_index["b"]
+        assert board.current_player == BLACK
+        assert board.en_passant == (0, 2)
+        assert board.rooks_moved == [-2, -1, -1, -2]
+        assert board.castling_rights() == 0b0110
+        assert board.zobrist_key == board.compute_zobrist_key()
+        assert Chess.from_fen(Chess().fen()).zobrist_key == Chess().zobrist_key
+        for fen in ("", "8/8/8 w - -", "rnbqkbnr/pppppppp/9/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -",
+                    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNX w KQkq -",
+                    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq -"):
+            self.assertRaises(BadFenException, Chess.from_fen, fen)
+
+    def test_from_fen_round_trip(self):
+        for fen in ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+                    "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e6 0 2",
+                    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                    "r3k2r/8/8/8/8/8/8/R3K2R b Kq - 17 42",
+                    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"):
+            assert Chess.from_fen(fen).fen() == fen
+        assert Chess.from_fen("8/8/8/4k3/8/8/8/4K3 w - -").fen() == "8/8/8/4k3/8/8/8/4K3 w - - 0 1"
+        self.assertRaises(BadFenException, Chess.from_fen, "8/8/8/4k3/8/8/8/4K3 w - - x 1")
+        self.assertRaises(BadFenException, Chess.from_fen, "8/8/8/4k3/8/8/8/4K3 w - - 0 0")
+
+    def test_from_fen_play(self):
+        fen = "r3k2r/8/8/8/8/8/8/R3K2R b Kq - 17 42"
+        board = Chess.from_fen(fen)
+        board.move((4, 7), (2, 7, False))
+        assert board.fen() == "2kr3r/8/8/8/8/8/8/R3K2R w K - 18 43"
+        board.move((4, 0), (6, 0, False))
+        assert board.fen() == "2kr3r/8/8/8/8/8/8/R4RK1 b - - 19 43"
+        assert board.pgn() == "42... O-O-O 43. O-O"
+        board.unmake_move()
+        board.unmake_move()
+        assert board.fen() == fen
+        assert board.zobrist_key == board.compute_zobrist_key()
+        assert (2, 0, False) not in list(board.valid_piece_moves((4, 0)))
+
+    def test_half_move_clock(self):
+        rng = random.Random(5)
+        clocks = [self.board.half_move_clock]
+        for ply in range(150):
+            moves = [(p, m) for p, ms in self.board.valid_moves().items() for m in ms]
+            if not moves:
+                break
+            piece, move = rng.choice(moves)
+            resets = self.board.is_type(piece, "P") or self.board.get_coord((move[0], move[1])) != EMPTY or len(move) == 4
+            self.board.make_move(piece, move)
+            clocks.append(0 if resets else clocks[-1] + 1)
+            assert self.board.half_move_clock == clocks[-1]
+            assert self.board.fen().split()[4:] == [str(clocks[-1]), str((len(clocks) - 1) // 2 + 1)]
+        while clocks:
+            assert self.board.half_move_clock == clocks.pop()
+            if clocks:
+                self.board.unmake_move()
+
+    def test_threefold_repetition(self):
+        shuffle = ("Nf3", "Nf6", "Ng1", "Ng8")
+        for san in shuffle:
+            self.board.move(self.board.move_from_san(san))
+        assert self.board.repetitions() == 2
+        assert not self.board.draw_claimable()
+        for san in shuffle[:3]:
+            self.board.move(self.board.move_from_san(san))
+        assert not self.board.draw_claimable()
+        self.board.move(self.board.move_from_san(shuffle[3]))
+        assert self.board.repetitions() == 3
+        assert self.board.draw_claimable()
+        assert self.board.game_state() == NORMAL
+        self.board.unmake_move()
+        assert not self.board.draw_claimable()
+
+    def test_fifty_move_rule(self):
+        board = Chess.from_fen("7k/8/8/8/8/8/5R2/K5R1 w - - 99 80")
+        assert not board.draw_claimable()
+        board.move((6, 0), (6, 1, True))
+        assert board.draw_claimable()
+        assert board.game_state() == NORMAL
+        board.unmake_move()
+        board.move((5, 1), (7, 1, True)) #mate on the hundredth ply still ends the game
+        assert board.game_state() == CHECKMATE
+
+    def test_check_with_claimable_draw(self):
+        board = Chess.from_fen("6k1/8/8/8/8/8/8/R5K1 w - - 100 80")
+        board.move(board.move_from_san("Ra8"))
+        assert board.draw_claimable()
+        assert board.game_state() == CHECK
+        assert board.pgn() == "80. Ra8+"
+
+    def test_piece_counts(self):
+        assert self.board.piece_counts == [32, 1, 1, 2, 2, 2, 8, 1, 1, 2, 2, 2, 8]
+        rng = random.Random(7)
+        for ply in range(150):
+            moves = self.board.valid_moves_encoded()
+            if not moves:
+                break
+            self.board.make_move(rng.choice(moves))
+            assert self.board.piece_counts[1:] == [popcount(bb) for bb in self.board.bitboards[1:]]
+            assert sum(self.board.piece_counts) == 64
+        while self.board.move_list:
+            self.board.unmake_move()
+        assert self.board.piece_counts == [32, 1, 1, 2, 2, 2, 8, 1, 1, 2, 2, 2, 8]
+
+    def test_insufficient_material_counts(self):
+        assert Chess.from_fen("8/8/4k3/8/8/3NK3/8/8 w - - 0 1").game_state() == DRAW
+        assert Chess.from_fen("8/8/4k3/8/8/2NNK3/8/8 w - - 0 1").game_state() == NORMAL
+        assert Chess.from_fen("8/8/4k3/8/8/3PK3/8/8 w - - 0 1").game_state() == NORMAL
+        board = Chess.from_fen("8/8/4k3/8/8/3rK3/8/8 w - - 0 1")
+        board.move((4, 2), (3, 2, True))
+        assert board.game_state() == DRAW
+
     def test_insufficient_material_2(self):
         self.board.board = [
             [0, 0, 0, 0, 0, 0, 0, 0],
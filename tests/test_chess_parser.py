@@ -0,0 +1,58 @@
+import unittest
+import os
+import tempfile
+
+from lark import Lark
+
+from pyanchetto import chess_parser
+from pyanchetto.chess_parser import grammar, cache_file, load_parser, parse_notation, parse_file
+
+short_game = '[Event "x"]\n1. e4 $1 e5 {c} 2. Nf3 Nbd7 3. exd8=Q+ R1a3 4. O-O 4... 0-0-0 1/2-1/2'
+cache_directory = None
+
+
+def setUpModule():
+    #parse_notation goes through get_parser, keep its cache out of the user's real cache directory
+    global cache_directory
+    cache_directory = tempfile.TemporaryDirectory()
+    chess_parser._parser = load_parser(cache_directory.name)
+
+
+def tearDownModule():
+    chess_parser._parser = None
+    cache_directory.cleanup()
+
+
+class TestChessParser(unittest.TestCase):
+
+    def test_parse(self):
+        tree = parse_notation(short_game)
+        pgn = tree.children[0]
+        assert [child.data for child in pgn.children] == ["metadata", "turn", "turn", "turn", "turn", "draw"]
+        assert [child.data for child in pgn.children[4].children] == ["move_number", "move", "move_number", "move"]
+        assert chess_parser.get_parser() is chess_parser.get_parser()
+
+    def test_example_game(self):
+        example_path = "examplepgn/" if "examplepgn" in os.listdir(".") else "../examplepgn/"
+        tree = parse_file(example_path + "test_game1.pgn")
+        turns = [child for child in tree.children[0].children if child.data == "turn"]
+        assert len(turns) == 75
+
+    def test_same_as_earley(self):
+        #a black move continued after its move number ("4... 0-0-0") is ambiguous for Earley, so it is left out here
+        game = short_game.replace(" 4... 0-0-0", " 0-0-0")
+        assert str(Lark(grammar).parse(game)) == str(parse_notation(game))
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            built = load_parser(directory)
+            assert os.listdir(directory) == [os.path.basename(cache_file(directory))]
+            loaded = load_parser(directory)
+            assert str(loaded.parse(short_game)) == str(built.parse(short_game))
+            with open(cache_file(directory), "wb") as file:
+                file.write(b"not a parser")
+            assert str(load_parser(directory).parse(short_game)) == str(built.parse(short_game))
+
+
+if __name__ == '__main__':
+    unittest.main()
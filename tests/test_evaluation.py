@@ -0,0 +1,74 @@
+import random
+import unittest
+
+from pyanchetto.chess import Chess
+from pyanchetto.evaluation import *
+from pyanchetto.move_encoding import encode, EN_PASSANT, PROMOTION
+
+
+class TestEvaluation(unittest.TestCase):
+
+    def test_initial_position(self):
+        assert evaluate(Chess()) == 0
+
+    def test_side_to_move(self):
+        board = Chess.from_fen("4k3/8/8/8/8/8/8/Q3K3 w - - 0 1")
+        score = evaluate(board)
+        assert score > piece_values[2] - 100
+        assert evaluate(Chess.from_fen("4k3/8/8/8/8/8/8/Q3K3 b - - 0 1")) == -score
+
+    def test_mirrored_position(self):
+        board = Chess.from_fen("r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3")
+        mirrored = Chess.from_fen("rnbqkb1r/pppp1ppp/5n2/4p3/4P3/2N5/PPPP1PPP/R1BQKBNR b KQkq - 2 3")
+        assert evaluate(board) == evaluate(mirrored)
+
+    def test_piece_square(self):
+        assert piece_square[5][27] == piece_values[5] + 20 #white knight on d4
+        assert piece_square[11][35] == -piece_values[11] - 20 #black knight on d5
+        assert piece_square[6][8] == piece_values[6] + 5 #white pawn on a2
+
+    def test_static_exchange(self):
+        board = Chess.from_fen("3rk3/8/2p5/3p4/4P3/8/3R4/3RK3 w - - 0 1")
+        assert static_exchange(board, encode(28, 35)) == 100 #exd5 cxd5 Rxd5 Rxd5 Rxd5
+        assert static_exchange(board, encode(11, 35)) == 100 - 500 + 100 #Rxd5 cxd5 exd5
+        board = Chess.from_fen("3rk3/8/8/3p4/8/8/3R4/3RK3 w - - 0 1")
+        assert static_exchange(board, encode(11, 35)) == 100 #Rxd5 Rxd5 Rxd5 with the d1 rook behind the d2 rook
+        board = Chess.from_fen("3rk3/8/8/3p4/8/8/3R4/4K3 w - - 0 1")
+        assert static_exchange(board, encode(11, 35)) == 100 - 500
+        assert not is_winning_capture(board, encode(11, 35))
+
+    def test_static_exchange_king(self):
+        board = Chess.from_fen("8/8/4k3/3p4/8/8/3R4/3RK3 w - - 0 1")
+        assert static_exchange(board, encode(11, 35)) == 100 #the king may not recapture on a defended square
+        board = Chess.from_fen("8/8/4k3/3p4/8/8/3R4/4K3 w - - 0 1")
+        assert static_exchange(board, encode(11, 35)) == 100 - 500
+
+    def test_static_exchange_special(self):
+        board = Chess.from_fen("4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1")
+        assert static_exchange(board, encode(36, 43, EN_PASSANT)) == 100
+        board = Chess.from_fen("2r1k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+        assert is_winning_capture(board, encode(49, 58, PROMOTION, 3)) #bxc8=Q
+        assert static_exchange(board, encode(49, 57, PROMOTION, 3)) == 800 - 900 #b8=Q Rxb8
+
+    def test_track_evaluation(self):
+        rng = random.Random(11)
+        board = Chess.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        untracked = Chess(board)
+        track_evaluation(board)
+        plies = 0
+        for ply in range(100):
+            moves = board.valid_moves_encoded()
+            if not moves:
+                break
+            move = rng.choice(moves)
+            board.make_move(move)
+            untracked.make_move(move)
+            plies += 1
+            assert evaluate(board) == evaluate(untracked)
+            assert board.material == sum(material_scores[p] * board.piece_counts[p] for p in range(1, 13))
+        for ply in range(plies):
+            board.unmake_move()
+            untracked.unmake_move()
+            assert evaluate(board) == evaluate(untracked)
+        board.track_scores(None, None)
+        assert board.score_tables is None and board.material == 0
@@ -0,0 +1,47 @@
+import random
+import unittest
+from array import array
+
+from pyanchetto.chess import Chess, BadMoveException
+from pyanchetto.move_encoding import *
+
+
+class TestMoveEncoding(unittest.TestCase):
+    def setUp(self):
+        self.board = Chess()
+
+    def test_encode(self):
+        move = encode_tuple((4, 1), (4, 3, False))
+        assert from_square(move) == 12 and to_square(move) == 28 and move_flag(move) == NORMAL_MOVE
+        assert to_uci(move) == "e2e4"
+        move = encode_tuple((0, 6), (0, 7, False, "Q"))
+        assert move_flag(move) == PROMOTION and promotion_type(move) == "Q"
+        assert to_uci(move) == "a7a8q"
+        assert move_flag(encode_tuple((4, 7), (6, 7, False))) == CASTLE
+        assert move_flag(encode_tuple((4, 4), (3, 5, False, 6))) == EN_PASSANT
+        assert move < 1 << 16
+
+    def test_decode_and_notation_round_trip(self):
+        rng = random.Random(11)
+        for game in range(3):
+            self.board = Chess()
+            for ply in range(80):
+                piece_moves = self.board.valid_moves()
+                moves = [(piece, move) for piece in piece_moves for move in piece_moves[piece]]
+                if not moves:
+                    break
+                for piece, move in moves:
+                    packed = encode_tuple(piece, move)
+                    assert self.board.decode_move(packed) == (piece, move)
+                    assert self.board.move_from_uci(to_uci(packed)) == packed
+                    assert self.board.move_from_san(self.board.san(piece, move)) == packed
+                encoded = self.board.valid_moves_encoded()
+                assert isinstance(encoded, array) and len(encoded) == len(moves)
+                self.board.make_move(rng.choice(encoded))
+
+    def test_move_accepts_packed_moves(self):
+        self.board.move(self.board.move_from_san("e4"))
+        self.board.move(self.board.move_from_uci("e7e5"))
+        self.board.move(self.board.move_from_san("Nf3"))
+        assert self.board.pgn() == "1. e4 e5 2. Nf3"
+        self.assertRaises(BadMoveException, self.board.move_from_san, "Qh4xf2")
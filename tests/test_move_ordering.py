@@ -0,0 +1,59 @@
+import unittest
+
+from pyanchetto.chess import Chess
+from pyanchetto.move_encoding import to_uci
+from pyanchetto.move_ordering import *
+from pyanchetto.search import Search
+
+
+class TestMoveOrdering(unittest.TestCase):
+    def setUp(self):
+        self.ordering = MoveOrdering()
+        #white can take the queen on d5 with the rook or the pawn, or the knight on f5 with the pawn
+        self.board = Chess.from_fen("4k3/8/8/3q1n2/4P3/8/8/3RK3 w - - 0 1")
+
+    def uci(self, picked):
+        return [(stage, to_uci(move)) for stage, move in picked]
+
+    def test_pick_all_moves_once(self):
+        for board in (Chess(), self.board, Chess.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")):
+            hash_move = board.valid_moves_encoded()[-1]
+            picked = [move for stage, move in self.ordering.pick(board, hash_move)]
+            assert sorted(picked) == sorted(board.valid_moves_encoded())
+            assert picked[0] == hash_move
+
+    def test_mvv_lva(self):
+        picked = self.uci(self.ordering.pick(self.board))
+        assert picked[:3] == [(CAPTURE_STAGE, "e4d5"), (CAPTURE_STAGE, "d1d5"), (CAPTURE_STAGE, "e4f5")]
+        assert all(stage == QUIET_STAGE for stage, move in picked[3:])
+
+    def test_illegal_hash_move(self):
+        hash_move = Chess().valid_moves_encoded()[0] #a knight move from the initial position
+        picked = list(self.ordering.pick(self.board, hash_move))
+        assert all(stage != HASH_STAGE for stage, move in picked)
+
+    def test_killers_and_history(self):
+        board = Chess()
+        moves = board.valid_moves_encoded()
+        self.ordering.cutoff(board, QUIET_STAGE, moves[5], 3, 4, 2)
+        self.ordering.cutoff(board, QUIET_STAGE, moves[7], 3, 2, 0)
+        assert self.ordering.killers[3] == [moves[7], moves[5]]
+        picked = list(self.ordering.pick(board, NULL_MOVE, 3))
+        assert picked[:2] == [(KILLER_STAGE, moves[7]), (KILLER_STAGE, moves[5])]
+        assert len(picked) == 20
+        picked = list(self.ordering.pick(board, NULL_MOVE, 4)) #no killers at this ply, history orders the quiets
+        assert picked[0] == (QUIET_STAGE, moves[5]) and picked[1] == (QUIET_STAGE, moves[7])
+        stats = self.ordering.stats()
+        assert stats["quiets"]["cutoffs"] == 2 and stats["cutoff_nodes"] == 2
+        assert stats["first_move_cutoff_rate"] == 0.5
+
+    def test_capture_cutoffs_are_not_killers(self):
+        move = [m for s, m in self.ordering.pick(self.board)][0]
+        self.ordering.cutoff(self.board, CAPTURE_STAGE, move, 0, 3, 0)
+        assert self.ordering.killers[0] == [NULL_MOVE, NULL_MOVE]
+        assert self.ordering.stats()["captures"]["cutoffs"] == 1
+
+    def test_search_stats(self):
+        result = Search().search(Chess(), 3)
+        assert result.ordering["cutoff_nodes"] > 0
+        assert sum(result.ordering[name]["searched"] for name in stage_names) > 0
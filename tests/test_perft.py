@@ -0,0 +1,65 @@
+import unittest
+
+from pyanchetto.chess import Chess
+from pyanchetto.move_tree import MoveTree
+from pyanchetto.perft import *
+
+
+class TestPerft(unittest.TestCase):
+    def setUp(self):
+        self.board = Chess()
+
+    def test_perft_hashed(self):
+        table = TranspositionTable(1)
+        for depth in range(5):
+            assert perft_hashed(self.board, depth, table) == correct[depth][0]
+        assert table.hits > 0
+        stats = table.stats()
+        assert stats["probes"] == stats["hits"] + stats["misses"]
+        assert self.board.fen() == Chess().fen()
+
+    def test_perft_hashed_replacement(self):
+        for replacement in (REPLACE_ALWAYS, REPLACE_DEPTH):
+            table = TranspositionTable(0.0001, replacement)
+            assert table.size < 10
+            assert perft_hashed(self.board, 3, table) == correct[3][0]
+            assert table.overwrites > 0
+
+    def test_perft_count(self):
+        counts = perft_count(self.board, 3)
+        for depth in range(4):
+            assert tuple(counts[depth]) == correct[depth]
+        assert self.board.fen() == Chess().fen()
+
+    def test_perft_count_discovered_checks(self):
+        counts = perft_count(Chess.from_fen(dict((name, fen) for name, fen, nodes in suite)["position 3"]), 4)
+        assert counts[4] == [43238, 3348, 123, 0, 0, 1680, 106, 0, 17]
+        board = Chess.from_fen("4k3/8/8/8/4N3/8/8/4RK2 w - - 0 1")
+        board.move(board.move_from_san("Nc3"))
+        assert perft_count(board, 0)[0][5:8] == [1, 1, 0]
+        board.unmake_move()
+        board.move(board.move_from_san("Nf6"))
+        assert perft_count(board, 0)[0][5:8] == [1, 0, 1] #a double check is not also a discovered check
+
+    def test_perft_count_matches_tree(self):
+        root = MoveTree("Root")
+        perft(root, root, self.board, 0, 2)
+        assert root.count_nodes() == 1 + 20 + 400
+        counts = perft_count(self.board, 2)
+        assert [c[0] for c in counts] == [1, 20, 400]
+
+    def test_perft_parallel(self):
+        for split_depth in (1, 2, 3):
+            counts = perft_parallel(self.board, 3, workers=2, split_depth=split_depth)
+            assert [tuple(c) for c in counts] == [correct[depth] for depth in range(4)]
+        assert self.board.fen() == Chess().fen()
+
+    def test_perft_suite(self):
+        for name, depth, nodes, expected, seconds in run_suite(2):
+            assert nodes == expected, name
+
+    def test_perft_divide(self):
+        divide = perft_divide(self.board, 3)
+        assert len(divide) == 20
+        assert dict(divide)["e2e4"] == 600
+        assert sum(nodes for move, nodes in divide) == correct[3][0]
@@ -80,6 +80,15 @@ class TestInterpreter(unittest.TestCase):
     def test_game_file8(self):
         self.game_file_test("test_game8.pgn", "8/8/5k2/5b2/R6K/8/8/6r1 b - - 113 172")
 
+    def test_game_file8_pgn(self):
+        #a draw by the fifty-move rule becomes claimable before the end, the checks after it still get a "+"
+        example_path = "examplepgn/" if "examplepgn" in os.listdir(".") else "../examplepgn/"
+        with open(example_path + "test_game8.pgn") as file:
+            movetext = " ".join(line for line in file.read().splitlines() if not line.startswith("["))
+        self.game_file_test("test_game8.pgn", "8/8/5k2/5b2/R6K/8/8/6r1 b - - 113 172")
+        assert self.board.pgn() == " ".join(movetext.split()[:-1])
+        assert "168. Rg3+" in self.board.pgn() and "169. Rg4+" in self.board.pgn()
+
     def test_game_file9(self):
         self.game_file_test("test_game9.pgn", "8/8/3k2p1/P6p/3pp3/P3b3/2K3PP/4R3 b - - 1 37")
 
@@ -140,6 +149,23 @@ class TestInterpreter(unittest.TestCase):
 
     def test_game_ambiguous(self):
         pgn = "1. Nc3 Nf6  2. Nf3 Nc6  3. Nh4 Nb4  4. Nf5 Rg8  5. Ne3 Rh8  6. Ned5"
-        correct_hash = "r1bqkb1r/pppppppp/5n2/3N4/1n6/2N5/PPPPPPPP/R1BQKB1R b KQk - 11 6"
+        correct_hash = "r1bqkb1r/pppppppp/5n2/3N4/1n6/2N5/PPPPPPPP/R1BQKB1R b KQq - 11 6"
         self.simple_game_test(pgn, correct_hash)
         assert self.board.game_state() == NORMAL
+
+    def test_history(self):
+        pgn = "1. e4 d5 2. exd5 Qxd5 3. Nc3 Qe5+ 4. Be2 Bg4 5. d4 Bxe2 6. Ngxe2 e6"
+        self.interpreter.execute(parse_notation(pgn).tree, False)
+        board = Chess()
+        fens, captured = [board.fen()], [board.get_captured_pieces()]
+        for from_coord, to_coord in self.interpreter.moves:
+            board.move(from_coord, to_coord)
+            fens.append(board.fen())
+            captured.append(board.get_captured_pieces())
+        assert len(self.interpreter.moves) == 12
+        assert self.interpreter.fens == fens
+        assert self.interpreter.captured == captured
+        assert self.interpreter.captured[-1] == [12, 6, 4, 10]
+        self.interpreter.execute(parse_notation("7. O-O").tree, False) #moves played later extend the history
+        assert len(self.interpreter.fens) == 14 and self.interpreter.fens[-1] == self.board.fen()
+        assert ChessInterpreter().fens == []
@@ -0,0 +1,77 @@
+import unittest
+import bz2
+import gzip
+import os
+import tempfile
+
+from pyanchetto.chess import Chess
+from pyanchetto.pgn_interpreter import ChessInterpreter
+from pyanchetto.pgn_parser import parse_games
+from pyanchetto.pgn_reader import split_games, read_games
+
+two_games = """[Event "One"]
+[Result "1-0"]
+
+1. e4 e5 {a [bracket] in a comment
+[not a tag]} 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0
+
+% escaped line
+[Event "Two"]
+[Result "0-1"]
+
+1. f3 e5 2. g4 Qh4# 0-1
+"""
+
+
+class TestPgnReader(unittest.TestCase):
+
+    def example_path(self, file):
+        if "examplepgn" in os.listdir("."):
+            return "examplepgn/" + file
+        return "../examplepgn/" + file
+
+    def test_split_games(self):
+        games = list(split_games(two_games.splitlines(True)))
+        assert len(games) == 2
+        assert games[0].startswith('[Event "One"]') and games[0].endswith("4. Qxf7# 1-0")
+        assert "[not a tag]" in games[0]
+        assert games[1].startswith('[Event "Two"]') and games[1].endswith("Qh4# 0-1")
+        assert "escaped" not in games[0] + games[1]
+
+    def test_split_games_comments_do_not_nest(self):
+        for comment in ("{see {note} the rook}", "; threat {Qh5"):
+            games = list(split_games(("[Event \"One\"]\n\n1. e4 " + comment + "\n" + "e5 1-0\n\n" +
+                                      "[Event \"Two\"]\n\n1. d4 d5 0-1\n").splitlines(True)))
+            assert len(games) == 2, comment
+            assert games[0].endswith("e5 1-0") and games[1] == '[Event "Two"]\n\n1. d4 d5 0-1'
+
+    def test_split_games_without_tags(self):
+        games = list(split_games(["1. e4 e5 *\n", "\n"]))
+        assert games == ["1. e4 e5 *"]
+        assert list(split_games([])) == []
+
+    def test_compressed_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, opener in (("games.pgn", open), ("games.pgn.gz", gzip.open), ("games.pgn.bz2", bz2.open)):
+                path = os.path.join(directory, name)
+                with opener(path, "wt") as file:
+                    file.write(two_games)
+                assert list(read_games(path)) == list(split_games(two_games.splitlines(True)))
+
+    def test_parse_games(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "games.pgn.gz")
+            with gzip.open(path, "wt") as file:
+                for game in ("test_game1.pgn", "test_game2.pgn"):
+                    with open(self.example_path(game)) as example:
+                        file.write(example.read() + "\n\n")
+            fens = []
+            for parser in parse_games(path):
+                board = Chess()
+                ChessInterpreter(board).execute(parser.tree, False)
+                fens.append(board.fen())
+        assert fens == ["8/8/8/7p/5k1P/7K/7P/8 w - - 1 76", "4r3/7P/6K1/8/8/3k4/8/8 b - - 2 62"]
+
+
+if __name__ == '__main__':
+    unittest.main()
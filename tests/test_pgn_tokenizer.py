@@ -0,0 +1,50 @@
+import unittest
+import os
+
+from pyanchetto.pgn_parser import parse_notation_recursive
+from pyanchetto.pgn_tokenizer import tokenize, TokenParser, TAG, COMMENT, NUMBER, NAG, MOVE, RESULT, WHITESPACE
+
+
+class TestTokenizer(unittest.TestCase):
+
+    def parse(self, string):
+        parser = TokenParser(string)
+        parser.parse()
+        return parser
+
+    def same_as_recursive(self, string):
+        parser, recursive = self.parse(string), parse_notation_recursive(string)
+        assert str(parser.tree) == str(recursive.tree)
+        assert str(parser.tokens) == str(recursive.tokens)
+
+    def test_tokenize(self):
+        kinds = [kind for kind, m in tokenize('[Event "x"]\n1. e4 $1 {best} e5 2. Nf3 1-0')]
+        assert kinds == [TAG, WHITESPACE, NUMBER, WHITESPACE, MOVE, WHITESPACE, NAG, WHITESPACE, COMMENT, WHITESPACE,
+                         MOVE, WHITESPACE, NUMBER, WHITESPACE, MOVE, WHITESPACE, RESULT]
+        moves = [m.group() for kind, m in tokenize("1. exd8=Q+ Nbxd7!? 2. O-O-O# R1a3") if kind == MOVE]
+        assert moves == ["exd8=Q+", "Nbxd7!?", "O-O-O#", "R1a3"]
+
+    def test_same_tree_as_recursive(self):
+        self.same_as_recursive('[Event "x"] [Site "y z"]\n1. e4 {a [b] c} e5 2. Nf3 $12 Nc6 {d}\n3. Bb5 a6 1/2-1/2')
+        self.same_as_recursive("1. e4 e5 2. exd5 Nbd7 3. R1a3 Qxh4+ 4. b8=N c1=Q?! 5. O-O O-O-O 0-1")
+        self.same_as_recursive("1... Nc3 1. f5 2. e4 {a} {b} 3. d4 1-0")
+
+    def test_example_games(self):
+        example_path = "examplepgn/" if "examplepgn" in os.listdir(".") else "../examplepgn/"
+        for file in sorted(os.listdir(example_path)):
+            with open(example_path + file) as pgn:
+                self.same_as_recursive(pgn.read())
+
+    def test_lenient(self):
+        #the recursive parser fails to look past the end of the text after a check
+        parser = self.parse("1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7#")
+        assert str(parser.tree).endswith("move_modifiers: [#]]]]]")
+
+    def test_errors(self):
+        for string in ("1. Nc3f5 1/2-1/2", "1. e4 *", "{comment} 1. e4", "1. Zz4", "1 e4", "1. e9", "1. e4 e5 2."):
+            with self.assertRaises(Exception):
+                self.parse(string)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import os
+import tempfile
+
+from pyanchetto.pgn_validator import pgn_files, iter_games, validate_game, validate_games
+
+valid_game = '[Event "Valid"]\n\n1. f3 e5 2. g4 Qh4# 0-1\n'
+invalid_game = '[Event "Invalid"]\n\n1. e4 e5 2. Ke5 1-0\n'
+
+
+class TestPgnValidator(unittest.TestCase):
+
+    def test_validate_game(self):
+        fen, termination, error, plies = validate_game(valid_game)
+        assert fen == "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3"
+        assert termination == "black_win"
+        assert error is None
+        assert plies == 4
+        fen, termination, error, plies = validate_game(invalid_game)
+        assert error is not None
+        assert plies == 2
+        fen, termination, error, plies = validate_game("1. e4 Zz5")
+        assert error.startswith("SyntaxError")
+        assert plies == 0
+
+    def test_validate_games(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, games in (("b.pgn", [valid_game, invalid_game]), ("a.pgn", [invalid_game]), ("notes.txt", [])):
+                with open(os.path.join(directory, name), "w") as file:
+                    file.write("\n".join(games))
+            assert [os.path.basename(f) for f in pgn_files(directory)] == ["a.pgn", "b.pgn"]
+            games = list(iter_games(directory)) * 5
+            progress = []
+            serial = list(validate_games(games, 1))
+            parallel = list(validate_games(games, 2, 2, lambda *args: progress.append(args)))
+        assert serial == parallel
+        assert [(os.path.basename(row[0]), row[1], row[4] is None) for row in serial[:3]] == \
+               [("a.pgn", 0, False), ("b.pgn", 0, True), ("b.pgn", 1, False)]
+        assert progress[-1][:2] == (15, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import time
+import unittest
+
+from pyanchetto.chess import Chess
+from pyanchetto.evaluation import MATE, evaluate
+from pyanchetto.move_encoding import to_uci
+from pyanchetto.search import *
+
+
+class TestSearch(unittest.TestCase):
+    def setUp(self):
+        self.search = Search()
+
+    def test_mate_in_one(self):
+        board = Chess.from_fen("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+        fen = board.fen()
+        result = self.search.search(board, 4)
+        assert to_uci(result.best_move) == "a1a8"
+        assert result.score == MATE - 1
+        assert result.pv == [result.best_move]
+        assert board.fen() == fen
+
+    def test_mated(self):
+        board = Chess.from_fen("R5k1/5ppp/8/8/8/8/8/6K1 b - - 0 1")
+        result = self.search.search(board, 2)
+        assert result.best_move == NULL_MOVE
+        assert result.score == -MATE
+
+    def test_wins_material(self):
+        board = Chess.from_fen("4k3/8/8/3q4/8/8/3R4/3RK3 w - - 0 1")
+        result = self.search.search(board, 2)
+        assert to_uci(result.best_move) == "d2d5"
+        assert result.score > 500
+
+    def test_principal_variation(self):
+        board = Chess()
+        result = self.search.search(board, 3)
+        assert result.depth == 3
+        assert len(result.pv) == 3 and result.pv[0] == result.best_move
+        for move in result.pv:
+            assert move in board.valid_moves_encoded()
+            board.make_move(move)
+        assert result.tree.children[0].move == result.best_move
+        assert result.tree.children[0].heuristic == result.score
+        assert len(result.tree.children) == 20
+
+    def test_node_limit(self):
+        depths = []
+        result = self.search.search(Chess(), 20, node_limit=2000, callback=lambda r: depths.append(r.depth))
+        assert result.nodes <= 2000
+        assert result.best_move in Chess().valid_moves_encoded()
+        assert depths == list(range(1, len(depths) + 1))
+
+    def test_time_limit(self):
+        result = self.search.search(Chess(), 20, time_limit=0.2)
+        assert result.seconds < 1.0
+        assert result.best_move != NULL_MOVE
+
+    def test_time_limit_margin(self):
+        board = Chess.from_fen("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        for time_limit in (0.02, 0.1):
+            start = time.perf_counter()
+            result = self.search.search(board, 20, time_limit=time_limit)
+            assert time.perf_counter() - start < time_limit + 0.05
+            assert result.best_move in board.valid_moves_encoded()
+
+    def test_quiescence(self):
+        board = Chess.from_fen("4k3/8/8/3r4/8/8/8/3QK3 w - - 0 1")
+        assert self.search.quiescence(board) >= evaluate(board) + 500
+        board = Chess.from_fen("4k3/8/2p5/3p4/8/8/8/3QK3 w - - 0 1")
+        assert self.search.quiescence(board) == evaluate(board)
+
+    def test_quiescence_avoids_horizon_blunder(self):
+        board = Chess.from_fen("4k3/8/2p5/3p4/8/8/8/3QK3 w - - 0 1") #d5 is defended by the c6 pawn
+        result = self.search.search(board, 1)
+        assert to_uci(result.best_move) != "d1d5"
@@ -0,0 +1,71 @@
+import io
+import time
+import unittest
+
+from pyanchetto.uci import *
+
+
+class TestUci(unittest.TestCase):
+    def setUp(self):
+        self.out = io.StringIO()
+        self.engine = UciEngine(self.out)
+
+    def lines(self):
+        return self.out.getvalue().splitlines()
+
+    def test_handshake(self):
+        for command in ("uci", "isready"):
+            assert self.engine.handle(command)
+        assert self.lines() == ["id name " + ENGINE_NAME, "id author " + ENGINE_AUTHOR, "uciok", "readyok"]
+        assert not self.engine.handle("quit")
+
+    def test_position(self):
+        self.engine.handle("position startpos moves e2e4 e7e5 g1f3")
+        assert self.engine.board.fen() == "rnbqkbnr/pppp1ppp/8/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2"
+        fen = "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1"
+        self.engine.handle("position fen " + fen + " moves e1g1")
+        assert self.engine.board.fen() == "r3k2r/8/8/8/8/8/8/R4RK1 b kq - 1 1"
+        self.engine.handle("position startpos moves e2e5")
+        assert self.lines() == ["info string illegal move e2e5"]
+
+    def test_go_depth(self):
+        self.engine.handle("position fen 6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+        self.engine.handle("go depth 3")
+        self.engine.thread.join()
+        lines = self.lines()
+        assert lines[0].startswith("info depth 1 score mate 1 ")
+        assert lines[-1] == "bestmove a1a8"
+
+    def test_stop(self):
+        self.engine.handle("go infinite")
+        self.engine.handle("isready")
+        self.engine.handle("stop")
+        lines = self.lines()
+        assert "readyok" in lines
+        assert lines[-1].startswith("bestmove ")
+        assert self.engine.thread is None
+
+    def test_go_infinite_waits_for_stop(self):
+        self.engine.handle("position fen 6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+        self.engine.handle("go infinite")
+        deadline = time.perf_counter() + 5
+        while not any(line.startswith("info depth 1 score mate 1 ") for line in self.lines()):
+            assert time.perf_counter() < deadline
+            time.sleep(0.01)
+        time.sleep(0.2) #the search stops at the mate, the bestmove has to wait for stop
+        assert self.engine.thread.is_alive()
+        assert not [line for line in self.lines() if line.startswith("bestmove")]
+        self.engine.handle("stop")
+        assert self.lines()[-1] == "bestmove a1a8"
+
+    def test_go_nodes(self):
+        self.engine.handle("go nodes 500")
+        self.engine.thread.join()
+        assert self.engine.search.nodes <= 500
+        assert self.lines()[-1].startswith("bestmove ")
+
+    def test_score_str(self):
+        assert score_str(35) == "cp 35"
+        assert score_str(MATE - 1) == "mate 1"
+        assert score_str(MATE - 3) == "mate 2"
+        assert score_str(-MATE + 2) == "mate -1"